@@ -5,6 +5,15 @@ import { saveExercise, fetchPastExercises } from "../api"; // Import API functio
 import { FaBars, FaUser, FaCog, FaHistory, FaSignOutAlt, FaFire, FaTrophy } from "react-icons/fa"; // Import icons
 import io from 'socket.io-client';
 import ExerciseChart from "../components/Chart"; 
+
+// Socket.IO event each exercise's live count arrives on, and its /last-session field.
+const COUNT_EVENTS = {
+  squats: { event: "count_update", sessionKey: "last_squat_session" },
+  pushups: { event: "pushup_count_update", sessionKey: "last_pushup_session" },
+  crunches: { event: "crunch_count_update", sessionKey: "last_crunch_session" },
+  pullups: { event: "pullup_count_update", sessionKey: "last_pullup_session" },
+};
+
 const Dashboard = () => {
   const navigate = useNavigate();
   const [exerciseCount, setExerciseCount] = useState({
@@ -27,6 +36,8 @@ const Dashboard = () => {
   const canvasRef = useRef(null);
   const [socket, setSocket] = useState(null);
   const [streak, setStreak] = useState(1);
+  const [lastRep, setLastRep] = useState(null);
+  const [people, setPeople] = useState([]);
 
   // Load name from localStorage
   useEffect(() => {
@@ -53,14 +64,21 @@ const Dashboard = () => {
       console.log('Connected to server');
     });
 
-    newSocket.on('count_update', (data) => {
-      console.log('Received count update:', data);
-      setSquatCount(data.count);
-      setStage(data.stage);
-      setExerciseCount(prev => ({
-        ...prev,
-        squats: data.count
-      }));
+    Object.entries(COUNT_EVENTS).forEach(([key, { event }]) => {
+      newSocket.on(event, (data) => {
+        console.log('Received count update:', data);
+        setSquatCount(data.count);
+        setStage(data.stage);
+        setExerciseCount(prev => ({
+          ...prev,
+          [key]: data.count
+        }));
+      });
+    });
+
+    // One record per finished rep: tempo, range of motion, and whether it was partial.
+    newSocket.on('rep', (data) => {
+      setLastRep(data);
     });
 
     return () => newSocket.disconnect();
@@ -77,9 +95,11 @@ const Dashboard = () => {
     try {
       setError(null);
       setIsLoading(true);
-      await axios.get('http://localhost:5000/start-counting');
+      await axios.get('http://localhost:5000/start-counting', { params: { exercise } });
       setIsDetecting(true);
       setActiveExercise(exercise);
+      setLastRep(null);
+      setPeople([]);
       
       // Reset the count for the specific exercise
       setExerciseCount(prev => ({
@@ -126,16 +146,20 @@ const Dashboard = () => {
     try {
       setIsDetecting(false);
       setActiveExercise(null);
-      const email = localStorage.getItem("email");
-      const count = exerciseCount[exercise];
+      await axios.get('http://localhost:5000/stop-counting', { params: { exercise } });
+
+      // The server's final count, in case the last socket update never arrived.
+      const { data } = await axios.get('http://localhost:5000/last-session', { params: { exercise } });
+      const count = data[COUNT_EVENTS[exercise].sessionKey] ?? exerciseCount[exercise];
+      setPeople(data.people || []);
 
+      const email = localStorage.getItem("email");
       if (!email) {
         console.error("No user email found in localStorage.");
         return;
       }
 
       await saveExercise(email, exercise, count);
-      await axios.get('http://localhost:5000/stop-counting');
     } catch (error) {
       console.error(`Error closing ${exercise} session:`, error);
       setError(`Failed to close ${exercise} session`);
@@ -147,7 +171,7 @@ const Dashboard = () => {
       <div className="relative" style={{ paddingTop: '56.25%' }}>
         {isDetecting && (
           <img
-            src="http://localhost:5000/video_feed"
+            src={`http://localhost:5000/video_feed?exercise=${activeExercise}`}
             alt="Exercise Video Feed"
             className="absolute top-0 left-0 w-full h-full object-contain rounded-lg"
             style={{
@@ -181,6 +205,13 @@ const Dashboard = () => {
             {activeExercise === 'bicepcurls' && (
               <p className="text-white text-sm">Engage your core!</p>
             )}
+            {lastRep && (
+              <p className="text-white text-sm">
+                {lastRep.partial
+                  ? "Last rep was partial, go through the full range!"
+                  : `Last rep: ${lastRep.duration_s}s, ${lastRep.range_of_motion}° range`}
+              </p>
+            )}
           </div>
         )}
         {isLoading && (
@@ -276,6 +307,19 @@ const Dashboard = () => {
         {/* Add Video Feed Section */}
         <VideoFeedSection />
 
+        {people.length > 0 && (
+          <div className="mb-6 bg-gray-900 p-4 rounded-lg shadow-md">
+            <h3 className="text-lg font-semibold mb-2 text-white">Reps per person</h3>
+            <div className="flex flex-wrap gap-3">
+              {people.map((person) => (
+                <span key={person.id} className="bg-gray-800 px-3 py-1 rounded-full">
+                  Person {person.id}: <span className="font-bold text-[#4AE290]">{person.count}</span>
+                </span>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Exercise Cards */}
         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-6">
           {[
@@ -0,0 +1,127 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Degradation ladder, cheapest last: (input scale, run inference every Nth frame,
+# MediaPipe model_complexity). Landmarks are normalised to the input size, so
+# downscaling needs no remapping afterwards.
+LEVELS = (
+    (1.0, 1, 1),
+    (0.75, 1, 1),
+    (0.75, 1, 0),
+    (0.5, 1, 0),
+    (0.5, 2, 0),
+    (0.5, 3, 0),
+)
+
+
+class AdaptiveController:
+    """Picks how much inference work to do per frame to hold a target FPS.
+
+    record() feeds it the measured pose.process() time; it keeps an
+    exponentially weighted average and moves one step down LEVELS after
+    `patience` consecutive samples over budget, or one step back up after
+    `recovery` consecutive samples comfortably under it. The budget is the
+    frame interval at `target_fps`, scaled by how many frames share each
+    inference at the current level.
+    """
+
+    def __init__(self, target_fps=15.0, levels=LEVELS, smoothing=0.2,
+                 patience=10, recovery=60, headroom=0.6, name="adaptive"):
+        self.name = name
+        self.levels = levels
+        self.target_fps = target_fps
+        self.smoothing = smoothing
+        self.patience = patience
+        self.recovery = recovery
+        self.headroom = headroom
+        self._lock = threading.Lock()
+        self.level = 0
+        self.avg_latency = 0.0
+        self._over = 0
+        self._under = 0
+        self._frame = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.downgrades = 0
+        self.upgrades = 0
+
+    @property
+    def enabled(self):
+        return bool(self.target_fps)
+
+    @property
+    def scale(self):
+        return self.levels[self.level][0]
+
+    @property
+    def infer_every(self):
+        return self.levels[self.level][1]
+
+    @property
+    def model_complexity(self):
+        return self.levels[self.level][2]
+
+    def should_infer(self):
+        """Call once per frame; False means reuse the previous landmarks."""
+        with self._lock:
+            self._frame += 1
+            if self._frame % self.infer_every == 0:
+                self.inferred += 1
+                return True
+            self.skipped += 1
+            return False
+
+    def record(self, latency):
+        """Feed one inference latency in seconds and adjust the level if needed."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.avg_latency == 0.0:
+                self.avg_latency = latency
+            else:
+                self.avg_latency += self.smoothing * (latency - self.avg_latency)
+
+            budget = self.infer_every / self.target_fps
+            if self.avg_latency > budget:
+                self._over += 1
+                self._under = 0
+            elif self.avg_latency < budget * self.headroom:
+                self._under += 1
+                self._over = 0
+            else:
+                self._over = self._under = 0
+
+            if self._over >= self.patience and self.level < len(self.levels) - 1:
+                self._change(self.level + 1)
+                self.downgrades += 1
+            elif self._under >= self.recovery and self.level > 0:
+                self._change(self.level - 1)
+                self.upgrades += 1
+
+    def _change(self, level):
+        old = self.levels[self.level]
+        self.level = level
+        self._over = self._under = 0
+        # The new level has a different cost profile; start averaging afresh.
+        self.avg_latency = 0.0
+        scale, every, complexity = self.levels[level]
+        logger.info(f"{self.name}: level {level} (scale {scale}, infer every {every}, "
+                    f"model_complexity {complexity}), was {old}")
+
+    def snapshot(self):
+        with self._lock:
+            scale, every, complexity = self.levels[self.level]
+            return {
+                "target_fps": self.target_fps,
+                "level": self.level,
+                "scale": scale,
+                "infer_every": every,
+                "model_complexity": complexity,
+                "avg_inference_ms": self.avg_latency * 1000,
+                "inferred_frames": self.inferred,
+                "skipped_frames": self.skipped,
+                "downgrades": self.downgrades,
+                "upgrades": self.upgrades,
+            }
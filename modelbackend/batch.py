@@ -0,0 +1,268 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from exercises import EXERCISES, resolve_exercise
+from kinematics import ANGLE_INDEX, NUM_LANDMARKS, joint_angles, landmarks_to_array
+from landmark_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, LandmarkCache
+from rep_counter import RepCounter
+from smoothing import LandmarkSmoother
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+
+# Pose settings for offline scoring; together with the MediaPipe version they key the landmark cache.
+POSE_SETTINGS = {"model_complexity": 1, "min_detection_confidence": 0.5, "min_tracking_confidence": 0.5}
+
+# One pose graph per worker process, created the first time a clip misses the cache.
+_pose = None
+_cache = None
+
+
+def _init_worker(cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+    global _cache
+    _cache = LandmarkCache(cache_dir, cache_bytes) if cache_dir else None
+
+
+def _get_pose():
+    global _pose
+    if _pose is None:
+        _pose = mp.solutions.pose.Pose(**POSE_SETTINGS)
+    return _pose
+
+
+def find_videos(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in sorted(files)
+                             if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS)
+        else:
+            paths.append(item)
+    return paths
+
+
+def exercise_for_path(path):
+    """Guess the exercise from a file name such as `alice_squats_0412.mp4`."""
+    for token in re.split(r"[^a-z-]+", os.path.basename(path).lower()):
+        exercise = resolve_exercise(token)
+        if exercise is not None:
+            return exercise
+    return None
+
+
+def extract_landmarks(path, pose):
+    """Run pose over every frame of a recording.
+
+    Returns a (T, 33, 4) float32 array with NaN rows where nobody was
+    detected, and the video's frame rate. Raises OSError if it can't be read.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError("could not open video")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    missing = np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = pose.process(image)
+            frames.append(landmarks_to_array(results.pose_landmarks.landmark)
+                          if results.pose_landmarks else missing)
+    finally:
+        cap.release()
+    points = np.stack(frames) if frames else np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+    return points, fps
+
+
+def load_landmarks(path, pose=None, cache=None):
+    """Landmarks for a recording from `cache` when present, else from running pose (and caching them).
+
+    Returns (points, fps, cached).
+    """
+    if cache is not None:
+        key = cache.key(path, dict(POSE_SETTINGS, mediapipe=mp.__version__))
+        hit = cache.get(key)
+        if hit is not None:
+            points, meta = hit
+            return points, meta["fps"], True
+    points, fps = extract_landmarks(path, pose or _get_pose())
+    if cache is not None:
+        cache.put(key, points, {"fps": fps, "frames": len(points), "file": os.path.abspath(path)})
+    return points, fps, False
+
+
+def count_landmarks(points, fps, spec, smooth=True):
+    """Apply the live counting rules to a (T, 33, 4) landmark array; returns reps, rep times and detections."""
+    smoother = LandmarkSmoother() if smooth else None
+    angle_index = ANGLE_INDEX[spec["angle"]]
+    counter = RepCounter(spec)
+    detected_mask = ~np.isnan(points[:, 0, 0])
+    rep_times = []
+    stage_changed_at = 0.0
+    for index, frame in enumerate(points):
+        timestamp = index / fps
+        detected = frame if detected_mask[index] else None
+        if smoother is not None:
+            detected = smoother.update(detected, timestamp)
+        if detected is None:
+            continue
+
+        angle = float(joint_angles(detected)[angle_index])
+        flexed = counter.flexed
+        if counter.update(angle):
+            rep_times.append({"rep": counter.count,
+                              "start_s": round(stage_changed_at, 3),
+                              "end_s": round(timestamp, 3)})
+        if counter.flexed != flexed:
+            stage_changed_at = timestamp
+    return {"reps": counter.count, "rep_times": rep_times, "detected_frames": int(detected_mask.sum())}
+
+
+def score_video(path, exercise, pose=None, smooth=True, cache=None, overrides=None):
+    """Count reps in one recording with the live counting rules, without drawing or encoding.
+
+    `overrides` replaces fields of the exercise spec (e.g. {"flex_below": 95}),
+    which is cheap to iterate on when `cache` already holds the clip.
+    """
+    spec = dict(EXERCISES[exercise], **(overrides or {}))
+    result = {"file": path, "exercise": exercise, "reps": 0, "frames": 0,
+              "detected_frames": 0, "fps": 0.0, "duration_s": 0.0, "rep_times": [], "error": None,
+              "cached": False}
+    started = time.perf_counter()
+    try:
+        points, fps, result["cached"] = load_landmarks(path, pose, cache if cache is not None else _cache)
+        result["fps"] = fps
+        result["frames"] = len(points)
+        result.update(count_landmarks(points, fps, spec, smooth=smooth))
+        result["duration_s"] = round(len(points) / fps, 3)
+    except OSError as e:
+        result["error"] = str(e)
+    except Exception as e:
+        logger.error(f"Error scoring {path}: {e}")
+        result["error"] = str(e)
+    result["processing_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _score_job(job):
+    path, exercise, smooth, overrides = job
+    return score_video(path, exercise, smooth=smooth, overrides=overrides)
+
+
+def score_videos(paths, exercise=None, workers=None, smooth=True, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES,
+                 overrides=None):
+    """Score many recordings across a process pool; returns results in input order.
+
+    With `cache_dir`, landmarks are read from and written to a LandmarkCache
+    there, so only clips the cache hasn't seen run the pose model.
+    """
+    jobs = []
+    results = {}
+    for path in paths:
+        job_exercise = exercise or exercise_for_path(path)
+        if job_exercise is None:
+            results[path] = {"file": path, "exercise": None, "reps": 0, "rep_times": [],
+                             "error": "could not infer exercise from file name; pass --exercise"}
+        else:
+            jobs.append((path, job_exercise, smooth, overrides))
+
+    if workers == 1:
+        # In-process, skipping pool start-up; handy when re-tuning off the cache.
+        _init_worker(cache_dir, cache_bytes)
+        for job in jobs:
+            results[job[0]] = _score_job(job)
+            logger.info(f"{job[0]}: {results[job[0]]['reps']} reps")
+        return [results[path] for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_dir, cache_bytes)) as pool:
+        futures = {pool.submit(_score_job, job): job[0] for job in jobs}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logger.error(f"Worker failed on {path}: {e}")
+                results[path] = {"file": path, "exercise": exercise, "reps": 0, "rep_times": [], "error": str(e)}
+            logger.info(f"{path}: {results[path]['reps']} reps")
+    return [results[path] for path in paths]
+
+
+def write_json(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def write_csv(results, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "exercise", "reps", "rep", "start_s", "end_s", "error"])
+        for result in results:
+            rows = result["rep_times"] or [{"rep": "", "start_s": "", "end_s": ""}]
+            for rep in rows:
+                writer.writerow([result["file"], result["exercise"], result["reps"],
+                                 rep["rep"], rep["start_s"], rep["end_s"], result.get("error") or ""])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count reps in recorded workout videos.")
+    parser.add_argument("inputs", nargs="+", help="video files or directories to scan")
+    parser.add_argument("--exercise", help="exercise for every file (default: guess from file name)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--raw", action="store_true", help="count on unsmoothed landmarks")
+    parser.add_argument("--json", dest="json_path", help="write per-file results as JSON")
+    parser.add_argument("--csv", dest="csv_path", help="write one row per rep as CSV")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="landmark cache directory")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2,
+                        help="landmark cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="always run the pose model")
+    parser.add_argument("--flex-below", type=float, help="override the exercise's flexed-angle threshold")
+    parser.add_argument("--extend-above", type=float, help="override the exercise's extended-angle threshold")
+    args = parser.parse_args(argv)
+
+    exercise = None
+    if args.exercise:
+        exercise = resolve_exercise(args.exercise)
+        if exercise is None:
+            parser.error(f"unknown exercise '{args.exercise}' (choose from {', '.join(sorted(EXERCISES))})")
+
+    paths = find_videos(args.inputs)
+    if not paths:
+        parser.error("no video files found")
+
+    logger.info(f"Scoring {len(paths)} videos")
+    overrides = {name: value for name, value in (("flex_below", args.flex_below),
+                                                 ("extend_above", args.extend_above)) if value is not None}
+    results = score_videos(paths, exercise=exercise, workers=args.workers, smooth=not args.raw,
+                           cache_dir=None if args.no_cache else args.cache_dir,
+                           cache_bytes=int(args.cache_size * 1024 ** 2), overrides=overrides)
+
+    if args.json_path:
+        write_json(results, args.json_path)
+    if args.csv_path:
+        write_csv(results, args.csv_path)
+    if not args.json_path and not args.csv_path:
+        json.dump(results, sys.stdout, indent=2)
+    return 0 if all(result.get("error") is None for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Allocations, copies and time per frame in the capture -> encode -> viewers loop.
+
+Compares the original frame loop (new capture frame, BGR->RGB for the model,
+RGB->BGR back for drawing, imencode, tobytes, and one multipart
+concatenation per viewer) against the current one (capture into a reused
+ring buffer, cvtColor into a reused scratch image, draw on the captured BGR
+frame, and one multipart part shared by every viewer). Pose inference is
+left out because it is identical in both loops.
+
+Each variant yields every object it creates, so the benchmark can keep them
+all alive while tracemalloc records the frame; the count of large blocks is
+the number of frame-sized or JPEG-sized copies per frame.
+
+    python benchmarks/bench_allocations.py [--width 640 --height 480] [--viewers 1 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import mjpeg_part  # noqa: E402
+from pipeline import BufferRing  # noqa: E402
+
+# Allocations smaller than this (headers, tuples, numpy scalars) aren't counted as copies.
+LARGE_BLOCK = 1024
+
+
+def draw(image):
+    cv2.circle(image, (image.shape[1] // 2, image.shape[0] // 2), 20, (245, 117, 66), 2)
+    cv2.putText(image, "Angle: 123.45", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+
+
+def legacy_frame(source, viewers, buffers):
+    frame = source.copy()  # cap.read() returned a new array every frame
+    yield frame
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    yield rgb
+    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    yield bgr
+    draw(bgr)
+    _, encoded = cv2.imencode(".jpg", bgr)
+    yield encoded
+    jpeg = encoded.tobytes()
+    yield jpeg
+    for _ in range(viewers):
+        yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+
+
+def current_frame(source, viewers, buffers):
+    frame = buffers["capture"].next(source.shape)
+    np.copyto(frame, source)  # stands in for cap.read(frame)
+    yield frame
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffers["rgb"].next(frame.shape))
+    yield rgb
+    draw(frame)
+    _, encoded = cv2.imencode(".jpg", frame)
+    yield encoded
+    part = mjpeg_part(encoded)
+    yield part
+    for _ in range(viewers):
+        yield part
+
+
+def measure(variant, source, viewers, frames):
+    buffers = {"capture": BufferRing(), "rgb": BufferRing(size=1)}
+    # Warm up so ring buffers and OpenCV's internal state are allocated.
+    for _ in range(20):
+        for _ in variant(source, viewers, buffers):
+            pass
+
+    tracemalloc.start()
+    blocks = size = 0
+    for _ in range(frames):
+        before = tracemalloc.take_snapshot()
+        alive = list(variant(source, viewers, buffers))
+        after = tracemalloc.take_snapshot()
+        for stat in after.compare_to(before, "traceback"):
+            if stat.size_diff >= LARGE_BLOCK:
+                blocks += stat.count_diff
+                size += stat.size_diff
+        del alive
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(frames):
+        for _ in variant(source, viewers, buffers):
+            pass
+    elapsed = time.perf_counter() - started
+    return blocks / frames, size / frames, elapsed / frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    # Smooth noise compresses like a camera frame rather than like static.
+    source = cv2.GaussianBlur(rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8), (31, 31), 0)
+
+    print(f"{'loop':<10}{'viewers':>8}{'copies/frame':>14}{'KiB/frame':>11}{'ms/frame':>10}")
+    for viewers in args.viewers:
+        for name, variant in (("legacy", legacy_frame), ("current", current_frame)):
+            blocks, size, seconds = measure(variant, source, viewers, args.frames)
+            print(f"{name:<10}{viewers:>8}{blocks:>14.1f}{size / 1024:>11.1f}{seconds * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
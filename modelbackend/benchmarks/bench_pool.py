@@ -0,0 +1,59 @@
+"""Compare aggregate inference throughput of concurrent sessions with and without the worker pool.
+
+Runs --sessions sessions over the same clip at full speed, first with pose
+inference on each session's own thread, then through a PoseWorkerPool of
+--workers processes, and prints total frames/s for each. The pool should
+scale with cores; in-process inference is held back by the GIL.
+
+    python benchmarks/bench_pool.py clips/alice_squats.mp4 [--sessions 4] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emitter import NullEmitter  # noqa: E402
+from inference_pool import PoseWorkerPool  # noqa: E402
+from sessions import Session  # noqa: E402
+from sources import VideoFileSource  # noqa: E402
+
+
+def run(clip, sessions, pool=None):
+    running = [Session(f"bench-{i}", VideoFileSource(clip), "squat", NullEmitter(), target_fps=0, lossless=True,
+                       inference_pool=pool) for i in range(sessions)]
+    started = time.perf_counter()
+    for session in running:
+        session.start()
+    for session in running:
+        session.wait()
+    elapsed = time.perf_counter() - started
+    frames = sum(session.pipeline.stats()["captured"] for session in running)
+    for session in running:
+        session.close()
+    return frames, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clip")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    frames, elapsed = run(args.clip, args.sessions)
+    print(f"in-process: {frames} frames in {elapsed:.1f}s ({frames / elapsed:.1f} frames/s)")
+
+    pool = PoseWorkerPool(args.workers).start()
+    try:
+        # Warm up every worker (imports, first graph) so start-up isn't timed.
+        run(args.clip, args.workers, pool)
+        frames, elapsed = run(args.clip, args.sessions, pool)
+    finally:
+        pool.close()
+    print(f"{args.workers} workers: {frames} frames in {elapsed:.1f}s ({frames / elapsed:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
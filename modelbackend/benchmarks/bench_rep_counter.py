@@ -0,0 +1,71 @@
+"""Throughput and accuracy of RepCounter on synthetic angle streams.
+
+Each stream sweeps the exercise's angle between its resting and flexed
+positions a known number of times, with Gaussian jitter and occasional NaN
+dropouts, so the counted reps can be compared against ground truth without
+a camera or MediaPipe.
+
+    python benchmarks/bench_rep_counter.py [--reps 200] [--noise 6] [--dwell 1 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercises import EXERCISES  # noqa: E402
+from rep_counter import RepCounter  # noqa: E402
+
+
+def synthetic_angles(spec, reps, frames_per_rep=40, noise=0.0, dropout=0.0, seed=0):
+    """Angle stream with `reps` full repetitions starting from the spec's start stage."""
+    rng = np.random.default_rng(seed)
+    low = spec["flex_below"] - 15
+    high = spec["extend_above"] + 10
+    phase = np.linspace(0, 2 * np.pi, frames_per_rep, endpoint=False)
+    one_rep = (high + low) / 2 + (high - low) / 2 * np.cos(phase)
+    if spec["start_stage"] == spec["flexed_stage"]:
+        one_rep = (high + low) - one_rep
+    angles = np.tile(one_rep, reps)
+    # Settle in the starting position so the final transition is seen.
+    angles = np.concatenate([angles, np.full(frames_per_rep // 2, angles[0])])
+    angles += rng.normal(0.0, noise, angles.shape)
+    angles[rng.random(angles.shape) < dropout] = np.nan
+    return angles
+
+
+def run(spec, angles):
+    counter = RepCounter(spec)
+    values = angles.tolist()
+    started = time.perf_counter()
+    for angle in values:
+        counter.update(angle)
+    elapsed = time.perf_counter() - started
+    return counter.count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reps", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=6.0, help="angle jitter in degrees (std dev)")
+    parser.add_argument("--dropout", type=float, default=0.02, help="fraction of frames with no landmarks")
+    parser.add_argument("--dwell", type=int, nargs="+", default=[1, 3], help="min_dwell values to compare")
+    parser.add_argument("--hysteresis", type=float, default=8.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'exercise':<10}{'dwell':>6}{'hyst':>6}{'counted':>9}{'expected':>10}{'ns/update':>11}")
+    for name, base_spec in EXERCISES.items():
+        angles = synthetic_angles(base_spec, args.reps, noise=args.noise, dropout=args.dropout)
+        for dwell in args.dwell:
+            hysteresis = args.hysteresis if dwell > 1 else 0.0
+            spec = dict(base_spec, min_dwell=dwell, hysteresis=hysteresis)
+            counted, elapsed = run(spec, angles)
+            print(f"{name:<10}{dwell:>6}{hysteresis:>6.0f}{counted:>9}{args.reps:>10}"
+                  f"{elapsed / len(angles) * 1e9:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Replay fixed inputs through the live session pipeline and record performance and accuracy.
+
+Every case runs a real Session (inference, overlay, encode and publish
+threads) over a replay source at full speed, with adaptive degradation off
+and lossless queues so each frame is processed exactly once and results are
+repeatable. By default the cases are synthetic landmark streams for every
+exercise (seeded, with jitter, glitches and dropouts), once with each side
+facing the camera. --labels adds recorded clips, given as a JSON file of
+{"path/to/clip.mp4": expected_reps}, whose exercise is taken from the file
+name as in batch.py; those run pose inference and JPEG encoding for one
+attached viewer.
+
+Each case reports frames/s, mean per-stage time, mean frame latency, peak
+RSS and the counted reps against ground truth. Landmark cases run no pose
+model, so their inference time is smoothing and counting alone, and their
+latency runs from capture to the landmarks reaching the publisher. Results are written as JSON
+(default benchmarks/results/replay-<commit>.json) and can be compared with a
+previous run:
+
+    python benchmarks/bench_replay.py [--reps 20] [--labels clips/labels.json]
+    python benchmarks/bench_replay.py --compare benchmarks/results/replay-abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import exercise_for_path  # noqa: E402
+from emitter import NullEmitter  # noqa: E402
+from exercises import EXERCISES  # noqa: E402
+from sessions import Session  # noqa: E402
+from sources import SyntheticLandmarkSource, VideoFileSource  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def drain(hub):
+    for _ in hub.subscribe():
+        pass
+
+
+def run_case(name, source, exercise, expected, viewer=False):
+    session = Session(f"bench-{name}", source, exercise, NullEmitter(), target_fps=0, lossless=True)
+    started = time.perf_counter()
+    session.start()
+    if viewer:
+        threading.Thread(target=drain, args=(session.hub,), daemon=True).start()
+    session.wait()
+    elapsed = time.perf_counter() - started
+    stats = session.pipeline.stats()
+    counted = session.tracker.counter.count
+    session.close()
+    return {
+        "case": name,
+        "exercise": exercise,
+        "frames": stats["captured"],
+        "fps": round(stats["captured"] / elapsed, 1),
+        "stage_ms": {stage: round(ms, 3) for stage, ms in stats["stage_ms"].items()},
+        "latency_ms": round(stats["avg_latency_ms"], 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "expected": expected,
+        "counted": counted,
+        "error": abs(counted - expected),
+    }
+
+
+def cases(args):
+    for exercise, spec in EXERCISES.items():
+        source = SyntheticLandmarkSource(spec, args.reps, fps=args.fps, seed=args.seed)
+        yield f"synthetic-{exercise}", source, exercise, args.reps, False
+        # The same exercise seen from the other side, with the left side occluded.
+        source = SyntheticLandmarkSource(spec, args.reps, fps=args.fps, seed=args.seed, side="right")
+        yield f"synthetic-{exercise}-right", source, exercise, args.reps, False
+    if args.labels:
+        with open(args.labels) as f:
+            labels = json.load(f)
+        base = os.path.dirname(os.path.abspath(args.labels))
+        for path, expected in labels.items():
+            path = path if os.path.isabs(path) else os.path.join(base, path)
+            exercise = exercise_for_path(path)
+            if exercise is None:
+                print(f"skipping {path}: no exercise in the file name", file=sys.stderr)
+                continue
+            yield os.path.basename(path), VideoFileSource(path), exercise, expected, True
+
+
+def print_results(results, baseline=None):
+    previous = {result["case"]: result for result in (baseline or {}).get("results", [])}
+    print(f"{'case':<28}{'frames':>8}{'fps':>9}{'infer ms':>10}{'latency':>9}{'rss MB':>8}"
+          f"{'expected':>10}{'counted':>9}{'vs base':>10}")
+    for result in results:
+        before = previous.get(result["case"])
+        delta = f"{(result['fps'] / before['fps'] - 1) * 100:+.0f}% fps" if before and before["fps"] else ""
+        if before and result["error"] != before["error"]:
+            delta += f" err {before['error']}->{result['error']}"
+        print(f"{result['case'][:27]:<28}{result['frames']:>8}{result['fps']:>9.1f}"
+              f"{result['stage_ms'].get('inference', 0.0):>10.2f}{result['latency_ms']:>9.1f}"
+              f"{result['peak_rss_mb'] or 0:>8.0f}{result['expected']:>10}{result['counted']:>9}{delta:>10}")
+    print(f"total absolute rep error: {sum(result['error'] for result in results)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", help="JSON file mapping clip paths to expected rep counts")
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of the synthetic streams")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="where to save results (default: benchmarks/results/replay-<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = [run_case(*case) for case in cases(args)]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"replay-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "python": platform.python_version(), "machine": platform.machine(),
+                   "results": results}, f, indent=2)
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
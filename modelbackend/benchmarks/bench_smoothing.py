@@ -0,0 +1,96 @@
+"""Per-frame cost and counting accuracy of LandmarkSmoother.
+
+By default this builds synthetic landmark streams for every exercise with
+coordinate jitter, single-frame glitches and detection dropouts, then counts
+reps on raw and smoothed landmarks against the known rep count. With
+--labels it instead scores real clips through batch.py, with smoothing on and
+off, against a JSON file of {"path/to/clip.mp4": expected_reps, ...}.
+
+    python benchmarks/bench_smoothing.py [--reps 50] [--fps 15 30]
+    python benchmarks/bench_smoothing.py --labels clips/labels.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercises import EXERCISES  # noqa: E402
+from kinematics import ANGLE_INDEX, joint_angles  # noqa: E402
+from rep_counter import RepCounter  # noqa: E402
+from smoothing import LandmarkSmoother  # noqa: E402
+from sources import synthetic_landmarks  # noqa: E402
+
+
+def count_reps(spec, points, fps, smoother=None):
+    counter = RepCounter(spec)
+    angle_index = ANGLE_INDEX[spec["angle"]]
+    smoothing_time = 0.0
+    for i, frame in enumerate(points):
+        detected = None if np.isnan(frame[0, 0]) else frame
+        if smoother is not None:
+            started = time.perf_counter()
+            detected = smoother.update(detected, i / fps)
+            smoothing_time += time.perf_counter() - started
+        if detected is not None:
+            counter.update(float(joint_angles(detected)[angle_index]))
+    return counter.count, smoothing_time / len(points)
+
+
+def run_synthetic(args):
+    print(f"{'exercise':<10}{'fps':>5}{'expected':>10}{'raw':>6}{'smoothed':>10}{'us/frame':>10}")
+    for name, spec in EXERCISES.items():
+        for fps in args.fps:
+            points = synthetic_landmarks(spec, args.reps, fps=fps, jitter=args.jitter,
+                                         glitch=args.glitch, dropout=args.dropout)
+            raw, _ = count_reps(spec, points, fps)
+            smoothed, cost = count_reps(spec, points, fps, LandmarkSmoother())
+            print(f"{name:<10}{fps:>5.0f}{args.reps:>10}{raw:>6}{smoothed:>10}{cost * 1e6:>10.1f}")
+
+
+def run_labelled(args):
+    from batch import exercise_for_path, score_videos
+    from landmark_cache import DEFAULT_CACHE_DIR
+
+    with open(args.labels) as f:
+        labels = json.load(f)
+    base = os.path.dirname(os.path.abspath(args.labels))
+    paths = [path if os.path.isabs(path) else os.path.join(base, path) for path in labels]
+    expected = dict(zip(paths, labels.values()))
+
+    print(f"{'clip':<40}{'exercise':>10}{'expected':>10}{'raw':>6}{'smoothed':>10}")
+    # The second pass reuses the landmarks cached by the first.
+    raw = score_videos(paths, workers=args.workers, smooth=False, cache_dir=DEFAULT_CACHE_DIR)
+    smoothed = score_videos(paths, workers=args.workers, smooth=True, cache_dir=DEFAULT_CACHE_DIR)
+    raw_error = smoothed_error = 0
+    for path, raw_result, smoothed_result in zip(paths, raw, smoothed):
+        raw_error += abs(raw_result["reps"] - expected[path])
+        smoothed_error += abs(smoothed_result["reps"] - expected[path])
+        print(f"{os.path.basename(path)[:39]:<40}{exercise_for_path(path) or '?':>10}"
+              f"{expected[path]:>10}{raw_result['reps']:>6}{smoothed_result['reps']:>10}")
+    print(f"total absolute rep error: raw {raw_error}, smoothed {smoothed_error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", help="JSON file mapping clip paths to expected rep counts")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--reps", type=int, default=50)
+    parser.add_argument("--fps", type=float, nargs="+", default=[10.0, 30.0])
+    parser.add_argument("--jitter", type=float, default=0.006, help="landmark noise (normalised units)")
+    parser.add_argument("--glitch", type=float, default=0.02, help="fraction of single-frame mis-detections")
+    parser.add_argument("--dropout", type=float, default=0.05, help="fraction of frames with no detection")
+    args = parser.parse_args(argv)
+
+    if args.labels:
+        run_labelled(args)
+    else:
+        run_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
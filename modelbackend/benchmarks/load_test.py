@@ -0,0 +1,134 @@
+"""Load test a running server with concurrent camera-less sessions.
+
+Each simulated client opens its own upload session (/start-counting with
+source=upload) and streams frames to /ingest at a fixed rate for one
+exercise. By default the frames are synthetic landmark streams with a known
+rep count, so the final counts are checked as well as the latency. With
+--jpeg the clients upload a blank JPEG instead, which exercises decode and
+pose inference (nobody is detected, so no reps are expected).
+
+    python benchmarks/load_test.py --url http://localhost:5000 [--clients 4] [--exercise curl]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercises import EXERCISES, resolve_exercise  # noqa: E402
+from sources import synthetic_landmarks  # noqa: E402
+
+
+def request(url, data=None, content_type=None, timeout=10.0):
+    req = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET")
+    if content_type:
+        req.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+
+
+def blank_jpeg(width=640, height=480):
+    import cv2
+
+    ok, buffer = cv2.imencode(".jpg", np.full((height, width, 3), 127, dtype=np.uint8))
+    return buffer.tobytes()
+
+
+def run_client(index, args, start_barrier):
+    session = f"{args.prefix}-{index}"
+    query = f"session={session}&exercise={args.exercise}"
+    spec = EXERCISES[args.exercise]
+    stream = synthetic_landmarks(spec, args.reps, fps=args.fps, seed=index)
+    jpeg = blank_jpeg() if args.jpeg else None
+    result = {"session": session, "sent": 0, "errors": 0, "latencies": [], "expected": None if jpeg else args.reps}
+
+    status, body = request(f"{args.url}/start-counting?{query}&source=upload")
+    if status != 200:
+        result["errors"] += 1
+        result["error"] = body
+        start_barrier.wait()
+        return result
+
+    start_barrier.wait()
+    interval = 1.0 / args.fps
+    next_frame = time.perf_counter()
+    for points in stream:
+        next_frame += interval
+        if jpeg is not None:
+            data, content_type = jpeg, "image/jpeg"
+        elif np.isnan(points[0, 0]):
+            # The client found nobody in this frame, so it has nothing to send.
+            data = None
+        else:
+            data, content_type = points.astype("<f4").tobytes(), "application/octet-stream"
+        if data is not None:
+            started = time.perf_counter()
+            status, body = request(f"{args.url}/ingest?{query}", data, content_type)
+            result["latencies"].append(time.perf_counter() - started)
+            result["sent"] += 1
+            if status != 200:
+                result["errors"] += 1
+                result.setdefault("error", body)
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    # Let the pipeline finish the last frames before reading the count.
+    time.sleep(0.5)
+    _, body = request(f"{args.url}/last-session?{query}")
+    result["counted"] = (body or {}).get(spec["session_key"])
+    request(f"{args.url}/stop-counting?{query}")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent sessions (the server caps this)")
+    parser.add_argument("--exercise", default="curl")
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--jpeg", action="store_true", help="upload blank JPEGs instead of landmarks")
+    parser.add_argument("--prefix", default="load")
+    args = parser.parse_args(argv)
+
+    args.exercise = resolve_exercise(args.exercise)
+    if args.exercise is None:
+        parser.error(f"unknown exercise; choose from {', '.join(sorted(EXERCISES))}")
+    args.url = args.url.rstrip("/")
+
+    start_barrier = threading.Barrier(args.clients)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda i: run_client(i, args, start_barrier), range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{'session':<12}{'sent':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'expected':>10}{'counted':>9}")
+    all_latencies = []
+    for result in results:
+        latencies = np.array(result["latencies"]) * 1000
+        all_latencies.extend(latencies)
+        p50, p95 = (np.percentile(latencies, [50, 95]) if len(latencies) else (float("nan"),) * 2)
+        expected = "-" if result["expected"] is None else result["expected"]
+        print(f"{result['session']:<12}{result['sent']:>7}{result['errors']:>8}{p50:>9.1f}{p95:>9.1f}"
+              f"{expected:>10}{str(result.get('counted', '-')):>9}")
+        if "error" in result:
+            print(f"  first error: {result['error']}")
+    sent = sum(result["sent"] for result in results)
+    print(f"{sent} uploads in {elapsed:.1f}s ({sent / elapsed:.1f}/s), "
+          f"p95 {np.percentile(all_latencies, 95) if all_latencies else float('nan'):.1f} ms overall")
+
+
+if __name__ == "__main__":
+    main()
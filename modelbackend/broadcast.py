@@ -0,0 +1,99 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+MJPEG_BOUNDARY = "frame"
+
+
+def mjpeg_part(jpeg):
+    """Frame one encoded JPEG as a multipart/x-mixed-replace part.
+
+    `jpeg` may be any bytes-like object (e.g. the array from cv2.imencode);
+    it is copied exactly once, into the finished part, which every viewer
+    then sends as-is.
+    """
+    header = b"--%s\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % (
+        MJPEG_BOUNDARY.encode(), memoryview(jpeg).nbytes)
+    return b"".join((header, jpeg, b"\r\n"))
+
+
+class FrameHub:
+    """Latest-frame broadcast buffer shared by every viewer of one producer.
+
+    The producer overwrites a single slot; each subscriber remembers the last
+    sequence number it sent and waits for a newer one. A slow viewer therefore
+    skips straight to the newest frame and never holds up the producer.
+
+    Subscribers served from greenlets pass a `waiter` (runtime.GeventWaiter)
+    that the producer wakes, instead of waiting on the hub's condition.
+    """
+
+    def __init__(self, name="hub"):
+        self.name = name
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._closed = False
+        self._waiters = set()
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+            for waiter in self._waiters:
+                waiter.wake()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            for waiter in self._waiters:
+                waiter.wake()
+
+    def latest(self):
+        with self._cond:
+            return self._seq, self._frame
+
+    def subscribe(self, timeout=1.0, waiter=None):
+        """Yield each newer frame until the hub closes; waits at most `timeout` per frame."""
+        with self._cond:
+            self.subscribers += 1
+            last_seq = 0
+            if waiter is not None:
+                self._waiters.add(waiter)
+        logger.info(f"{self.name}: viewer joined ({self.subscribers} watching)")
+        try:
+            while True:
+                with self._cond:
+                    if waiter is None:
+                        self._cond.wait_for(lambda: self._closed or self._seq != last_seq, timeout)
+                    else:
+                        # Cleared before looking, so a publish after this can't be missed.
+                        waiter.clear()
+                    closed, seq, frame = self._closed, self._seq, self._frame
+                if closed:
+                    return
+                if seq == last_seq:
+                    if waiter is not None:
+                        waiter.wait(timeout)
+                    continue
+                last_seq = seq
+                yield frame
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+                self._waiters.discard(waiter)
+                if self.subscribers == 0:
+                    self.idle_since = time.monotonic()
+            if waiter is not None:
+                waiter.close()
+            logger.info(f"{self.name}: viewer left ({self.subscribers} watching)")
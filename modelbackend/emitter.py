@@ -0,0 +1,139 @@
+import threading
+import time
+import logging
+
+from metrics import SOCKET_EMITS
+
+logger = logging.getLogger(__name__)
+
+
+class _RoomBuffer:
+    __slots__ = ("times", "angles", "confidences", "stage", "count", "exercise")
+
+    def __init__(self):
+        self.times = []
+        self.angles = []
+        self.confidences = []
+        self.stage = None
+        self.count = 0
+        self.exercise = None
+
+
+class TelemetryEmitter:
+    """Batches per-frame pose telemetry and counter events into periodic Socket.IO messages.
+
+    Producers call push(), event() and queue_event() from their frame
+    threads; all three only append to in-memory buffers under a short lock. A background task wakes
+    every `interval` seconds, swaps the buffers out and does all network I/O
+    itself, so no frame thread ever blocks on a slow client.
+
+    Each room gets one `telemetry` message per interval carrying the angle
+    samples (downsampled to at most `max_samples`), their landmark
+    confidence, and the latest stage and count. Counter events are coalesced
+    per (event, room, key) so only the latest payload of each is sent per
+    tick; pass a `key` (e.g. a person ID) to keep events about different
+    subjects in the same room apart. Events that each carry a record of their
+    own (e.g. one per finished rep) go through queue_event() instead, which
+    never merges: every one is sent, in order, on the next tick.
+    """
+
+    def __init__(self, socketio, interval=0.1, max_samples=32, event_name="telemetry"):
+        self.socketio = socketio
+        self.interval = interval
+        self.max_samples = max_samples
+        self.event_name = event_name
+        self._lock = threading.Lock()
+        self._rooms = {}
+        self._events = {}
+        self._queued = []
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self.socketio.start_background_task(self._loop)
+        logger.info(f"Telemetry emitter started ({self.interval * 1000:.0f} ms interval)")
+
+    def stop(self):
+        self._running = False
+
+    def push(self, room, timestamp, angle, stage, count, confidence, exercise=None):
+        with self._lock:
+            buffer = self._rooms.get(room)
+            if buffer is None:
+                buffer = self._rooms[room] = _RoomBuffer()
+            buffer.times.append(timestamp)
+            buffer.angles.append(angle)
+            buffer.confidences.append(confidence)
+            buffer.stage = stage
+            buffer.count = count
+            buffer.exercise = exercise
+
+    def event(self, event, payload, room=None, key=None):
+        with self._lock:
+            self._events[(event, room, key)] = payload
+
+    def queue_event(self, event, payload, room=None):
+        with self._lock:
+            self._queued.append((event, payload, room))
+
+    def _loop(self):
+        while self._running:
+            self.socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error emitting telemetry: {e}")
+
+    def flush(self):
+        with self._lock:
+            rooms, self._rooms = self._rooms, {}
+            events, self._events = self._events, {}
+            queued, self._queued = self._queued, []
+
+        for event, payload, room in queued:
+            self.socketio.emit(event, payload, to=room)
+            SOCKET_EMITS.labels(event).inc()
+
+        for (event, room, _), payload in events.items():
+            self.socketio.emit(event, payload, to=room)
+            SOCKET_EMITS.labels(event).inc()
+
+        now = time.perf_counter()
+        for room, buffer in rooms.items():
+            step = max(1, -(-len(buffer.times) // self.max_samples))
+            self.socketio.emit(self.event_name, {
+                "room": room,
+                "exercise": buffer.exercise,
+                "stage": buffer.stage,
+                "count": buffer.count,
+                # Sample ages in ms relative to this message, oldest first.
+                "age_ms": [round((now - t) * 1000) for t in buffer.times[::step]],
+                "angle": [None if angle != angle else round(angle, 1) for angle in buffer.angles[::step]],
+                "confidence": [None if c != c else round(c, 2) for c in buffer.confidences[::step]],
+            }, to=room)
+            SOCKET_EMITS.labels(self.event_name).inc()
+
+
+class NullEmitter:
+    """Stands in for TelemetryEmitter when a session runs without a Socket.IO server (replays, benchmarks)."""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def push(self, room, timestamp, angle, stage, count, confidence, exercise=None):
+        pass
+
+    def event(self, event, payload, room=None, key=None):
+        pass
+
+    def queue_event(self, event, payload, room=None):
+        pass
+
+    def flush(self):
+        pass
@@ -0,0 +1,190 @@
+import itertools
+import shutil
+import subprocess
+import threading
+import time
+import logging
+
+import cv2
+
+from pipeline import BufferRing
+
+try:
+    import simplejpeg
+except ImportError:  # optional; OpenCV encodes when it isn't installed
+    simplejpeg = None
+
+logger = logging.getLogger(__name__)
+
+# Quality/bandwidth profiles a viewer can ask for with ?profile=. Each profile
+# is encoded once per frame and shared by all of its viewers. `width` caps the
+# frame width (None keeps the camera's resolution); `crf` is the H.264
+# equivalent of `quality`.
+PROFILES = {
+    "high": {"quality": 90, "width": None, "crf": 23},
+    "medium": {"quality": 75, "width": 640, "crf": 28},
+    "low": {"quality": 50, "width": 320, "crf": 33},
+}
+DEFAULT_PROFILE = "high"
+
+
+class OpenCVJpegEncoder:
+    name = "opencv"
+
+    def __init__(self, quality):
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+    def encode(self, image):
+        ret, buffer = cv2.imencode('.jpg', image, self.params)
+        return buffer if ret else None
+
+
+class SimpleJpegEncoder:
+    """libjpeg-turbo through simplejpeg; reads BGR directly and uses the fast DCT."""
+
+    name = "simplejpeg"
+
+    def __init__(self, quality):
+        self.quality = quality
+
+    def encode(self, image):
+        return simplejpeg.encode_jpeg(image, self.quality, colorspace="BGR", colorsubsampling="420", fastdct=True)
+
+
+JPEG_BACKENDS = {"opencv": OpenCVJpegEncoder, "simplejpeg": SimpleJpegEncoder}
+
+
+def create_jpeg_encoder(backend="auto", quality=PROFILES[DEFAULT_PROFILE]["quality"]):
+    """`backend` is "opencv", "simplejpeg", or "auto" (simplejpeg when installed)."""
+    if backend == "auto":
+        backend = "simplejpeg" if simplejpeg is not None else "opencv"
+    if backend == "simplejpeg" and simplejpeg is None:
+        logger.warning("simplejpeg is not installed; falling back to OpenCV JPEG encoding")
+        backend = "opencv"
+    return JPEG_BACKENDS[backend](quality)
+
+
+class Rescaler:
+    """Shrinks frames to a profile's width into one reused buffer (the frame itself if already small enough)."""
+
+    def __init__(self, width):
+        self.width = width
+        self.buffer = BufferRing(size=1)
+
+    def __call__(self, image):
+        height, width = image.shape[:2]
+        if self.width is None or width <= self.width:
+            return image
+        size = (self.width, max(2, round(height * self.width / width)) // 2 * 2)
+        return cv2.resize(image, size, dst=self.buffer.next((size[1], size[0], 3)), interpolation=cv2.INTER_AREA)
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+class H264Stream:
+    """One viewer's fragmented-MP4/H.264 stream from a local ffmpeg process.
+
+    write() feeds raw BGR frames to ffmpeg's stdin; chunks() yields the MP4
+    fragments it produces. Fragments start at every keyframe (one a second),
+    so a browser <video> element can begin playback straight away.
+    """
+
+    def __init__(self, width, height, fps, crf, chunk_size=64 * 1024):
+        self.chunk_size = chunk_size
+        self.process = subprocess.Popen(
+            ["ffmpeg", "-loglevel", "error",
+             "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+             "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-crf", str(crf),
+             "-pix_fmt", "yuv420p", "-g", str(fps),
+             "-movflags", "frag_keyframe+empty_moov+default_base_moof", "-f", "mp4", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def write(self, frame):
+        try:
+            self.process.stdin.write(memoryview(frame).cast("B"))
+            return True
+        except (BrokenPipeError, ValueError):
+            return False
+
+    def chunks(self):
+        while True:
+            chunk = self.process.stdout.read1(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def paced(frames, fps, clock=time.perf_counter, max_gap=2.0):
+    """Retime frames arriving at any rate to a constant `fps`, as the H.264 stream declares.
+
+    Each frame is repeated for every output tick until the next one
+    arrives, and frames that arrive within the same tick are dropped. The
+    repeats for a gap are only written once the next frame shows up; after
+    a gap longer than `max_gap` seconds the clock restarts instead, so a
+    stalled feed doesn't come back as a burst of copies.
+    """
+    start = None
+    written = 0
+    previous = None
+    for frame in frames:
+        now = clock()
+        if start is None:
+            start = now
+        due = int((now - start) * fps) + 1 - written
+        if due > max_gap * fps:
+            start = now - written / fps
+            due = 1
+        if due <= 0:
+            continue
+        for _ in range(due - 1):
+            yield previous
+        yield frame
+        previous = frame
+        written += due
+
+
+def h264_stream(frames, fps, crf):
+    """Encode an iterator of equally sized BGR frames to fragmented MP4 chunks.
+
+    ffmpeg starts on the first frame, once the size is known. A feeder
+    thread writes frames while this generator relays ffmpeg's output, so
+    the two never wait on each other. ffmpeg is told the input is a steady
+    `fps`, which the feeder holds with paced() whatever rate the pipeline
+    delivers at.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return
+    height, width = first.shape[:2]
+    stream = H264Stream(width, height, fps, crf)
+    closed = threading.Event()
+
+    def feed():
+        try:
+            for frame in paced(itertools.chain((first,), frames), fps):
+                if closed.is_set() or frame.shape[:2] != (height, width) or not stream.write(frame):
+                    break
+        finally:
+            frames.close()
+            try:
+                stream.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+    threading.Thread(target=feed, name="h264-feed", daemon=True).start()
+    try:
+        yield from stream.chunks()
+    finally:
+        closed.set()
+        stream.close()
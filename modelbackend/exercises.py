@@ -0,0 +1,85 @@
+# Each exercise counts reps on one named angle from kinematics.ANGLE_NAMES: a
+# side-less name ("knee") fuses both sides by visibility so either side may
+# face the camera, while "left_knee"/"right_knee" pins one side (e.g. for
+# single-arm work).
+# The stage flips to `flexed_stage` when the angle drops below `flex_below` and
+# back to `extended_stage` when it rises above `extend_above`; `count_on` says
+# which of those two transitions completes a rep. Optional `hysteresis` (degrees)
+# and `min_dwell` (frames) tune rep_counter.RepCounter. Adding an exercise only
+# means adding an entry here.
+EXERCISES = {
+    "squat": {
+        "label": "Squats",
+        "angle": "knee",
+        "flex_below": 100,
+        "extend_above": 160,
+        "flexed_stage": "squat",
+        "extended_stage": "stand",
+        "start_stage": "stand",
+        "count_on": "extend",
+        "event": "count_update",
+        "session_key": "last_squat_session",
+        "aliases": ("squats",),
+    },
+    "pushup": {
+        "label": "Push-ups",
+        "angle": "elbow",
+        "flex_below": 90,
+        "extend_above": 160,
+        "flexed_stage": "down",
+        "extended_stage": "up",
+        "start_stage": "up",
+        "count_on": "extend",
+        "event": "pushup_count_update",
+        "session_key": "last_pushup_session",
+        "aliases": ("pushups", "push-up", "push-ups"),
+    },
+    "pullup": {
+        "label": "Pull-ups",
+        "angle": "elbow",
+        "flex_below": 40,
+        "extend_above": 160,
+        "flexed_stage": "up",
+        "extended_stage": "down",
+        "start_stage": "down",
+        "count_on": "flex",
+        "event": "pullup_count_update",
+        "session_key": "last_pullup_session",
+        "aliases": ("pullups", "pull-up", "pull-ups"),
+    },
+    "crunch": {
+        "label": "Crunches",
+        "angle": "trunk",
+        "flex_below": 50,
+        "extend_above": 160,
+        "flexed_stage": "up",
+        "extended_stage": "down",
+        "start_stage": "down",
+        "count_on": "flex",
+        "event": "crunch_count_update",
+        "session_key": "last_crunch_session",
+        "aliases": ("crunches",),
+    },
+    "curl": {
+        "label": "Curls",
+        "angle": "elbow",
+        "flex_below": 30,
+        "extend_above": 160,
+        "flexed_stage": "up",
+        "extended_stage": "down",
+        "start_stage": "up",
+        "count_on": "flex",
+        "event": "curl_count_update",
+        "session_key": "last_curl_session",
+        "aliases": ("curls", "bicepcurl", "bicepcurls", "bicep-curl"),
+    },
+}
+
+_ALIASES = {alias: name for name, spec in EXERCISES.items() for alias in (name, *spec["aliases"])}
+
+
+def resolve_exercise(name):
+    if not name:
+        return None
+    return _ALIASES.get(name.strip().lower())
+
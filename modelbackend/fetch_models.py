@@ -0,0 +1,61 @@
+"""Download the model bundles that aren't shipped with the code.
+
+Group sessions (?people=N) run MediaPipe's Tasks PoseLandmarker, which loads
+its model from people.POSE_LANDMARKER_MODEL (models/pose_landmarker_full.task
+next to this file unless the POSE_LANDMARKER_MODEL env var points elsewhere).
+Single-person sessions use the model bundled with the mediapipe package and
+need nothing from here.
+
+    python fetch_models.py [--force]
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import urllib.request
+
+from people import POSE_LANDMARKER_MODEL, POSE_LANDMARKER_URL
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def fetch(url, path, force=False):
+    """Download `url` to `path` unless it is already there; returns True if it downloaded."""
+    if os.path.exists(path) and not force:
+        logger.info(f"{path} already exists")
+        return False
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    logger.info(f"Downloading {url}")
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f, urllib.request.urlopen(url, timeout=60) as response:
+            shutil.copyfileobj(response, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    logger.info(f"Saved {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the PoseLandmarker model used by group sessions.")
+    parser.add_argument("--force", action="store_true", help="download again even if the file exists")
+    parser.add_argument("--url", default=POSE_LANDMARKER_URL, help="where to download the model from")
+    parser.add_argument("--output", default=POSE_LANDMARKER_MODEL,
+                        help="where to save it (default: POSE_LANDMARKER_MODEL)")
+    args = parser.parse_args(argv)
+    try:
+        fetch(args.url, args.output, force=args.force)
+    except OSError as e:
+        logger.error(f"Could not download {args.url}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import logging
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from kinematics import landmarks_to_array
+
+logger = logging.getLogger(__name__)
+
+# Frame slots per session. A slot stays reserved until its worker has answered
+# the request that used it, even one the session stopped waiting for, so a
+# worker never reads a frame that is being overwritten.
+SLOTS_PER_SESSION = 2
+INFERENCE_TIMEOUT = 5.0
+# Times a worker that crashed is restarted before its sessions are failed for good.
+MAX_WORKER_RESTARTS = 3
+
+
+class LandmarkResult:
+    """Stands in for a Pose.process() result built from a landmark array (a worker's reply, or ROI-mapped landmarks).
+
+    `points` is the (33, 4) array, or None when nobody was detected.
+    pose_landmarks is only built (for drawing) when something asks for it.
+    """
+
+    __slots__ = ("points", "_landmarks")
+
+    def __init__(self, points):
+        self.points = points
+        self._landmarks = None
+
+    @property
+    def pose_landmarks(self):
+        if self.points is None:
+            return None
+        if self._landmarks is None:
+            self._landmarks = landmark_pb2.NormalizedLandmarkList(landmark=[
+                landmark_pb2.NormalizedLandmark(x=x, y=y, z=z, visibility=v) for x, y, z, v in self.points.tolist()])
+        return self._landmarks
+
+
+def _worker_main(requests, results):
+    from sessions import create_pose
+
+    poses = {}
+    segments = {}
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        if message[0] == "close":
+            session_id = message[1]
+            for key in [key for key in poses if key[0] == session_id]:
+                poses.pop(key).close()
+            segment = segments.pop(session_id, None)
+            if segment is not None:
+                segment.close()
+            continue
+
+        _, request_id, session_id, name, offset, shape, graph = message
+        try:
+            segment = segments.get(session_id)
+            if segment is None or segment.name != name:
+                if segment is not None:
+                    segment.close()
+                # Spawned workers share the server's resource tracker, so
+                # attaching doesn't take ownership; the session unlinks it.
+                segment = segments[session_id] = shared_memory.SharedMemory(name=name)
+            image = np.ndarray(shape, dtype=np.uint8, buffer=segment.buf, offset=offset)
+            image.flags.writeable = False
+            pose = poses.get((session_id, graph))
+            if pose is None:
+                pose = poses[(session_id, graph)] = create_pose(graph[0])
+            landmarks = pose.process(image).pose_landmarks
+            del image
+            results.put((request_id, landmarks_to_array(landmarks.landmark) if landmarks else None, None))
+        except Exception as e:
+            results.put((request_id, None, f"{type(e).__name__}: {e}"))
+
+    for pose in poses.values():
+        pose.close()
+    for segment in segments.values():
+        segment.close()
+
+
+class PoseClient:
+    """One session's handle on the pool: its worker and its shared-memory frame slots.
+
+    Write the RGB frame into buffer(shape) (e.g. as cv2.cvtColor's dst) and
+    pass that array to process(); only the slot offset and shape cross the
+    process boundary. Slots are sized for the largest frame seen so far, so
+    the adaptive downscale never reallocates; a larger frame moves the
+    session to a bigger segment.
+    """
+
+    def __init__(self, pool, worker, session_id, slots=SLOTS_PER_SESSION):
+        self.pool = pool
+        self.worker = worker
+        self.session_id = session_id
+        self.slots = slots
+        self.segment = None
+        self.slot_bytes = 0
+        self._slot = 0
+        # The request last sent from each slot; -1 for none.
+        self._sent = [-1] * slots
+
+    def buffer(self, shape):
+        size = int(np.prod(shape))
+        if size > self.slot_bytes:
+            self._release_segment()
+            self.segment = shared_memory.SharedMemory(create=True, size=size * self.slots)
+            self.slot_bytes = size
+            self._sent = [-1] * self.slots
+            logger.info(f"{self.session_id}: {self.slots} x {size / 1e6:.1f} MB inference slots in "
+                        f"{self.segment.name} on worker {self.worker}")
+        for _ in range(self.slots):
+            self._slot = (self._slot + 1) % self.slots
+            if self.pool.answered(self.worker, self._sent[self._slot]):
+                break
+        else:
+            raise RuntimeError(f"{self.session_id}: pose worker {self.worker} has not answered for any "
+                               f"inference slot")
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.segment.buf, offset=self._slot * self.slot_bytes)
+
+    def process(self, image, model_complexity, cropped=False, timeout=INFERENCE_TIMEOUT):
+        """Run pose on `image` (from buffer()) in this session's worker; returns a LandmarkResult.
+
+        `cropped` selects the session's graph for ROI crops (see Session.pose()).
+        """
+        request_id, future = self.pool.submit(self.worker, self.session_id, self.segment.name,
+                                              self._slot * self.slot_bytes, image.shape, (model_complexity, cropped))
+        self._sent[self._slot] = request_id
+        try:
+            return LandmarkResult(future.result(timeout))
+        finally:
+            # After a timeout the pool stops tracking the request; its slot stays reserved (see buffer()).
+            self.pool.discard(request_id)
+
+    def _release_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+    def close(self):
+        self.pool.detach(self)
+        self._release_segment()
+
+
+class PoseWorkerPool:
+    """Pose inference in worker processes, so sessions use every core instead of sharing the GIL.
+
+    Each session is pinned to one worker (the least loaded when it attaches)
+    because MediaPipe tracks the person from frame to frame; a worker keeps
+    one pose graph per session, model complexity and input kind (full frame
+    or ROI crop). Frames travel through
+    the session's shared-memory slots (see PoseClient) and landmarks come
+    back as (33, 4) arrays on the worker's result queue, which a dispatcher
+    thread hands to the waiting session.
+
+    A monitor thread watches the worker processes. When one dies, its pending
+    requests fail at once instead of timing out, and it is restarted (with
+    fresh queues) up to `max_restarts` times; after that its sessions get
+    an error for every frame.
+    """
+
+    def __init__(self, workers, max_restarts=MAX_WORKER_RESTARTS):
+        self.workers = workers
+        self.max_restarts = max_restarts
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = []
+        self._requests = []
+        self._results = []
+        self._futures = {}
+        # Workers answer in order, so every request up to this ID is done.
+        self._answered = [-1] * workers
+        self._restarts = [0] * workers
+        self._given_up = [False] * workers
+        self._sessions = [0] * workers
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._closing = False
+
+    def start(self):
+        if self._processes:
+            return self
+        for index in range(self.workers):
+            process, requests, results = self._spawn(index)
+            self._processes.append(process)
+            self._requests.append(requests)
+            self._results.append(results)
+        threading.Thread(target=self._monitor, name="pose-pool-monitor", daemon=True).start()
+        logger.info(f"Started {self.workers} pose inference workers")
+        return self
+
+    def _spawn(self, index):
+        requests, results = self._context.Queue(), self._context.Queue()
+        process = self._context.Process(target=_worker_main, args=(requests, results),
+                                        name=f"pose-worker-{index}", daemon=True)
+        process.start()
+        threading.Thread(target=self._dispatch, args=(index, process, results),
+                         name=f"pose-pool-dispatch-{index}", daemon=True).start()
+        return process, requests, results
+
+    def attach(self, session_id):
+        with self._start_lock:
+            self.start()
+        with self._lock:
+            worker = min(range(self.workers), key=self._sessions.__getitem__)
+            self._sessions[worker] += 1
+        return PoseClient(self, worker, session_id)
+
+    def detach(self, client):
+        with self._lock:
+            self._sessions[client.worker] -= 1
+            self._requests[client.worker].put(("close", client.session_id))
+
+    def submit(self, worker, session_id, name, offset, shape, graph):
+        """Queue one frame for `worker`; returns (request_id, future)."""
+        future = Future()
+        with self._lock:
+            if not self._processes[worker].is_alive():
+                raise RuntimeError(f"pose worker {worker} has exited")
+            request_id = next(self._ids)
+            self._futures[request_id] = (worker, future)
+            self._requests[worker].put(("infer", request_id, session_id, name, offset, tuple(shape), graph))
+        return request_id, future
+
+    def discard(self, request_id):
+        """Stop tracking a request, e.g. one the caller gave up waiting for."""
+        with self._lock:
+            self._futures.pop(request_id, None)
+
+    def answered(self, worker, request_id):
+        """Whether `worker` is done with `request_id` (answered it, or died since it was sent)."""
+        return request_id <= self._answered[worker]
+
+    def _dispatch(self, index, process, results):
+        while True:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                if self._closing or self._processes[index] is not process:
+                    return
+                continue
+            if message is None:
+                return
+            request_id, points, error = message
+            with self._lock:
+                if self._processes[index] is not process:
+                    return
+                self._answered[index] = request_id
+                entry = self._futures.pop(request_id, None)
+            if entry is None:
+                continue
+            future = entry[1]
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(points)
+
+    def _monitor(self):
+        while not self._closing:
+            with self._lock:
+                watched = {process.sentinel: (index, process) for index, process in enumerate(self._processes)
+                           if not self._given_up[index]}
+            if not watched:
+                return
+            for sentinel in wait(list(watched), timeout=1.0):
+                self._worker_exited(*watched[sentinel])
+
+    def _worker_exited(self, index, process):
+        with self._lock:
+            # Daemon workers are also terminated when the interpreter exits.
+            if self._closing or self._processes[index] is not process or not threading.main_thread().is_alive():
+                return
+            pending = [request_id for request_id, (worker, _) in self._futures.items() if worker == index]
+            futures = [self._futures.pop(request_id)[1] for request_id in pending]
+            # Nothing sent to the dead worker will be answered now.
+            self._answered[index] = next(self._ids)
+            old_requests = self._requests[index]
+            restart = self._restarts[index] < self.max_restarts
+            if restart:
+                self._restarts[index] += 1
+                self._processes[index], self._requests[index], self._results[index] = self._spawn(index)
+            else:
+                self._given_up[index] = True
+        process.join(timeout=1.0)
+        # Unread requests must not hold up interpreter exit.
+        old_requests.cancel_join_thread()
+        if restart:
+            old_requests.close()
+        error = RuntimeError(f"pose worker {index} exited with code {process.exitcode}")
+        for future in futures:
+            future.set_exception(error)
+        if restart:
+            logger.error(f"{error}; failed {len(futures)} pending requests, restarted it "
+                         f"({self._restarts[index]}/{self.max_restarts})")
+        else:
+            logger.error(f"{error}; failed {len(futures)} pending requests, not restarting it again "
+                         f"after {self.max_restarts} restarts")
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "sessions": list(self._sessions), "pending": len(self._futures),
+                    "alive": [process.is_alive() for process in self._processes],
+                    "restarts": list(self._restarts)}
+
+    def close(self):
+        self._closing = True
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        for results in self._results:
+            results.put(None)
+        self._processes, self._requests, self._results = [], [], []
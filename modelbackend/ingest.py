@@ -0,0 +1,171 @@
+import math
+import threading
+import logging
+
+import cv2
+import numpy as np
+
+from kinematics import NUM_LANDMARKS
+from pipeline import BufferRing, FramePacket
+from sources import Landmarks
+
+try:
+    import simplejpeg
+except ImportError:  # optional; OpenCV decodes when it isn't installed
+    simplejpeg = None
+
+logger = logging.getLogger(__name__)
+
+# Uploads larger than this are refused before decoding.
+MAX_FRAME_BYTES = 2 * 1024 * 1024
+
+
+class IngestError(Exception):
+    status = 400
+
+
+class FrameTooLargeError(IngestError):
+    status = 413
+
+
+def parse_landmarks(payload, max_people=1):
+    """Turn raw little-endian float32 bytes or nested lists into a (33, 4) array.
+
+    With `max_people` > 1 the payload may hold up to that many people back
+    to back, and the result is (N, 33, 4). Bytes are viewed in place with
+    np.frombuffer, so a binary upload is never copied.
+    """
+    person_bytes = NUM_LANDMARKS * 4 * 4
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        size = memoryview(payload).nbytes
+        if max_people == 1 and size != person_bytes:
+            raise IngestError(f"Expected {person_bytes} bytes of float32 landmarks, got {size}")
+        if size % person_bytes or not 0 < size // person_bytes <= max_people:
+            raise IngestError(f"Expected 1 to {max_people} people of {person_bytes} bytes of float32 landmarks, "
+                              f"got {size} bytes")
+        points = np.frombuffer(payload, dtype="<f4").reshape(-1, NUM_LANDMARKS, 4)
+    else:
+        try:
+            points = np.asarray(payload, dtype=np.float32)
+        except (TypeError, ValueError):
+            raise IngestError("Landmarks must be a list of [x, y, z, visibility] rows")
+        if points.shape == (NUM_LANDMARKS, 4):
+            points = points[None]
+        if points.ndim != 3 or points.shape[1:] != (NUM_LANDMARKS, 4) or not 0 < len(points) <= max_people:
+            raise IngestError(f"Expected landmarks of shape ({NUM_LANDMARKS}, 4)"
+                              + (f" or (N <= {max_people}, {NUM_LANDMARKS}, 4)" if max_people > 1 else "")
+                              + f", got {points.shape}")
+    points = points[0] if max_people == 1 else points
+    if not np.isfinite(points).all():
+        raise IngestError("Landmarks contain NaN or infinite values")
+    return points
+
+
+def parse_timestamp(value):
+    """A client capture time in seconds from a query argument or message field, or None when absent."""
+    if value is None or value == "":
+        return None
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        raise IngestError(f"Timestamp must be a number of seconds, got {value!r}")
+    if not math.isfinite(timestamp):
+        raise IngestError("Timestamp must be finite")
+    return timestamp
+
+
+class FrameDecoder:
+    """Decodes uploaded JPEGs into a ring of reusable BGR buffers.
+
+    With simplejpeg installed the decoder writes straight into the next
+    buffer of the ring (reallocated only when the frame size changes), so a
+    steady stream decodes without allocating. OpenCV's imdecode has no output
+    argument, so the fallback allocates a fresh array per frame.
+    """
+
+    def __init__(self):
+        self.buffers = BufferRing()
+
+    def decode(self, data):
+        if len(data) > MAX_FRAME_BYTES:
+            raise FrameTooLargeError(f"Frame of {len(data)} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+        if simplejpeg is not None:
+            try:
+                height, width, _, _ = simplejpeg.decode_jpeg_header(data)
+                buffer = self.buffers.next((height, width, 3))
+                return simplejpeg.decode_jpeg(data, colorspace="BGR", buffer=buffer)
+            except ValueError as e:
+                raise IngestError(f"Could not decode JPEG: {e}")
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise IngestError("Could not decode image")
+        return frame
+
+
+class IngestSource:
+    """Frame source fed by client uploads instead of a local camera.
+
+    Producers (HTTP or Socket.IO handlers) call push_jpeg() or
+    push_landmarks(); the pipeline's capture thread calls read(). Only the
+    newest upload is kept, so a client sending faster than the node can
+    infer just has its older frames replaced. read() blocks until a new
+    upload arrives and returns None once the run's `stop_event` is set.
+    The source is its own stream, so uploads land in whichever run is live.
+
+    Each upload is stamped with the client's capture `timestamp` when one
+    is given, otherwise with its arrival time; smoothing and rep timing run
+    on that stamp, so a burst of buffered frames keeps its real spacing. A
+    client should send timestamps with every frame of a session or none.
+    """
+
+    kind = "upload"
+
+    def __init__(self, poll_interval=0.1, max_people=1):
+        self.stop_event = None
+        self.poll_interval = poll_interval
+        self.max_people = max_people
+        self.decoder = FrameDecoder()
+        self.received = 0
+        self.replaced = 0
+        self.last_received = None
+        self._item = None
+        self._cond = threading.Condition()
+
+    def __str__(self):
+        return "uploaded frames"
+
+    def open(self, stop_event):
+        self.stop_event = stop_event
+        return self
+
+    def close(self):
+        pass
+
+    def push_jpeg(self, data, timestamp=None):
+        self._put(self.decoder.decode(data), timestamp)
+
+    def push_landmarks(self, payload, timestamp=None):
+        self._put(Landmarks(parse_landmarks(payload, self.max_people)), timestamp)
+
+    def _put(self, item, timestamp):
+        packet = FramePacket(0, item, timestamp=timestamp)
+        with self._cond:
+            if self._item is not None:
+                self.replaced += 1
+            self._item = packet
+            self.received += 1
+            self.last_received = packet.timings["capture"]
+            self._cond.notify()
+
+    def read(self):
+        with self._cond:
+            while self._item is None:
+                if self.stop_event.is_set():
+                    return None
+                self._cond.wait(self.poll_interval)
+            item, self._item = self._item, None
+            return item
+
+    def stats(self):
+        return {"received": self.received, "replaced": self.replaced,
+                "decoder": "simplejpeg" if simplejpeg is not None else "opencv"}
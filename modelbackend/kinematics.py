@@ -0,0 +1,119 @@
+import numpy as np
+
+# MediaPipe Pose landmark indices used by the joint angles below.
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+LEFT_FOOT_INDEX, RIGHT_FOOT_INDEX = 31, 32
+
+NUM_LANDMARKS = 33
+
+# name -> (a, vertex, b); the angle is measured at the vertex between a and b.
+JOINT_ANGLES = {
+    "left_elbow": (LEFT_WRIST, LEFT_ELBOW, LEFT_SHOULDER),
+    "right_elbow": (RIGHT_WRIST, RIGHT_ELBOW, RIGHT_SHOULDER),
+    "left_shoulder": (LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP),
+    "right_shoulder": (RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP),
+    "left_hip": (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    "right_hip": (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    "left_knee": (LEFT_ANKLE, LEFT_KNEE, LEFT_HIP),
+    "right_knee": (RIGHT_ANKLE, RIGHT_KNEE, RIGHT_HIP),
+    "left_ankle": (LEFT_KNEE, LEFT_ANKLE, LEFT_FOOT_INDEX),
+    "right_ankle": (RIGHT_KNEE, RIGHT_ANKLE, RIGHT_FOOT_INDEX),
+    # Hip-knee-shoulder at the knee: how far the torso has curled towards the legs.
+    "left_trunk": (LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER),
+    "right_trunk": (RIGHT_HIP, RIGHT_KNEE, RIGHT_SHOULDER),
+}
+
+# Side-less names fuse the left and right angle of the same joint (see joint_angles()).
+BILATERAL_ANGLES = {name[len("left_"):]: (name, "right_" + name[len("left_"):])
+                    for name in JOINT_ANGLES if name.startswith("left_")}
+
+ANGLE_NAMES = tuple(JOINT_ANGLES) + tuple(BILATERAL_ANGLES)
+ANGLE_INDEX = {name: i for i, name in enumerate(ANGLE_NAMES)}
+
+# Both sides are averaged (weighted by visibility) only when each side's
+# least visible landmark clears MIN_SIDE_VISIBILITY and the two angles are
+# within MAX_SIDE_DISAGREEMENT degrees; otherwise the better-seen side wins.
+MIN_SIDE_VISIBILITY = 0.5
+MAX_SIDE_DISAGREEMENT = 25.0
+
+_A = np.array([joints[0] for joints in JOINT_ANGLES.values()])
+_B = np.array([joints[1] for joints in JOINT_ANGLES.values()])
+_C = np.array([joints[2] for joints in JOINT_ANGLES.values()])
+_LEFT = np.array([ANGLE_INDEX[left] for left, _ in BILATERAL_ANGLES.values()])
+_RIGHT = np.array([ANGLE_INDEX[right] for _, right in BILATERAL_ANGLES.values()])
+_LEFT_JOINTS = np.array([JOINT_ANGLES[left] for left, _ in BILATERAL_ANGLES.values()])
+_RIGHT_JOINTS = np.array([JOINT_ANGLES[right] for _, right in BILATERAL_ANGLES.values()])
+
+
+def landmarks_to_array(landmarks, out=None):
+    """Copy a MediaPipe landmark list into a (33, 4) x/y/z/visibility array.
+
+    Pass the previous frame's array as `out` to reuse it. Works for both
+    `pose_landmarks.landmark` and `pose_world_landmarks.landmark`.
+    """
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    for i, landmark in enumerate(landmarks):
+        out[i, 0] = landmark.x
+        out[i, 1] = landmark.y
+        out[i, 2] = landmark.z
+        out[i, 3] = landmark.visibility
+    return out
+
+
+def angle_sides(name):
+    """The one-sided JOINT_ANGLES names behind an angle name (two for a bilateral name)."""
+    return BILATERAL_ANGLES.get(name, (name,))
+
+
+def joint_angles(points, dims=2):
+    """Every angle in ANGLE_NAMES, in degrees, for one frame or a batch.
+
+    `points` is (33, D) or (T, 33, D) with D >= dims; the result is
+    (len(ANGLE_NAMES),) or (T, len(ANGLE_NAMES)) in ANGLE_NAMES order: the
+    one-sided JOINT_ANGLES followed by the fused BILATERAL_ANGLES. Use
+    dims=2 for image landmarks and dims=3 for world landmarks. Degenerate
+    joints (coincident points) and missing (NaN) landmarks come back as NaN
+    instead of raising. The fused angles weigh each side by the visibility
+    column when D == 4 and weigh both sides equally otherwise.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    xyz = points[..., :dims]
+    ba = xyz[..., _A, :] - xyz[..., _B, :]
+    bc = xyz[..., _C, :] - xyz[..., _B, :]
+    dot = np.einsum("...i,...i->...", ba, bc)
+    norms = np.sqrt(np.einsum("...i,...i->...", ba, ba) * np.einsum("...i,...i->...", bc, bc))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = dot / norms
+    cosine[norms == 0] = np.nan
+    np.clip(cosine, -1.0, 1.0, out=cosine)
+    sided = np.degrees(np.arccos(cosine))
+    return np.concatenate([sided, _fuse_sides(sided, points)], axis=-1)
+
+
+def _fuse_sides(sided, points):
+    left, right = sided[..., _LEFT], sided[..., _RIGHT]
+    if points.shape[-1] > 3:
+        visibility = points[..., 3]
+        left_weight = visibility[..., _LEFT_JOINTS].min(axis=-1)
+        right_weight = visibility[..., _RIGHT_JOINTS].min(axis=-1)
+    else:
+        left_weight = right_weight = np.ones_like(left)
+    left_weight = np.where(np.isnan(left), 0.0, left_weight)
+    right_weight = np.where(np.isnan(right), 0.0, right_weight)
+    with np.errstate(invalid="ignore"):
+        fuse = ((np.minimum(left_weight, right_weight) >= MIN_SIDE_VISIBILITY)
+                & (np.abs(left - right) <= MAX_SIDE_DISAGREEMENT))
+        fused = (left * left_weight + right * right_weight) / (left_weight + right_weight)
+    return np.where(fuse, fused, np.where(left_weight >= right_weight, left, right))
+
+
+def angle_of(angles, name):
+    """Pick one named angle out of a joint_angles() result (frame or batch)."""
+    return angles[..., ANGLE_INDEX[name]]
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout changes so stale entries are never read back.
+CACHE_FORMAT = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "modelbackend", "landmarks")
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LandmarkCache:
+    """Per-recording pose landmarks on disk, so thresholds can be re-tuned without re-running the model.
+
+    Each entry is a (T, 33, 4) float32 .npy of x/y/z/visibility, one row per
+    frame with NaN where nobody was detected, plus a small JSON sidecar
+    (fps, frame count, source path). Entries are keyed by the SHA-256 of
+    the video's contents and the pose settings, so an edited clip or a
+    different model never hits a stale entry. get() memory-maps the array,
+    so loading costs nothing until frames are read. A clip's digest is
+    remembered under digests/ by path, size and mtime, so an unchanged clip
+    is only read in full the first time any run sees it.
+
+    The directory is kept under `max_bytes` by deleting the least recently
+    used entries after each put(); get() refreshes an entry's mtime.
+    Writes go through a temporary file and os.replace(), so concurrent
+    workers never see a half-written entry.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._digests = {}
+        self.digest_directory = os.path.join(directory, "digests")
+        os.makedirs(self.digest_directory, exist_ok=True)
+
+    def key(self, path, settings):
+        settings = json.dumps(dict(settings, format=CACHE_FORMAT), sort_keys=True)
+        return hashlib.sha256(f"{self.digest(path)}:{settings}".encode()).hexdigest()[:32]
+
+    def digest(self, path):
+        """file_digest(path), reused while the file keeps the same path, size and mtime."""
+        stat = os.stat(path)
+        stamp = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        digest = self._digests.get(stamp)
+        if digest is not None:
+            return digest
+        memo = os.path.join(self.digest_directory, hashlib.sha256(stamp.encode()).hexdigest()[:32])
+        try:
+            with open(memo) as f:
+                digest = f.read()
+        except OSError:
+            pass
+        if digest is None or len(digest) != 64:
+            digest = file_digest(path)
+            self._write(memo, lambda f: f.write(digest.encode()))
+        self._digests[stamp] = digest
+        return digest
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def get(self, key):
+        """(points, meta) for `key`, with points memory-mapped read-only, or None on a miss."""
+        array_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            points = np.load(array_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        for entry in (array_path, meta_path):
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+        return points, meta
+
+    def put(self, key, points, meta):
+        array_path, meta_path = self._paths(key)
+        self._write(array_path, lambda f: np.save(f, np.ascontiguousarray(points, dtype=np.float32)))
+        self._write(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+        self.evict()
+
+    def _write(self, path, write):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def entries(self):
+        """(mtime, bytes, key) for every complete entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npy"):
+                continue
+            key = name[:-4]
+            array_path, meta_path = self._paths(key)
+            try:
+                array_stat, meta_stat = os.stat(array_path), os.stat(meta_path)
+            except OSError:
+                continue
+            entries.append((array_stat.st_mtime, array_stat.st_size + meta_stat.st_size, key))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                for entry in self._paths(key):
+                    try:
+                        os.unlink(entry)
+                    except OSError:
+                        pass
+                total -= size
+                logger.info(f"Evicted cached landmarks {key} ({size / 1e6:.1f} MB)")
+            return total
+
+    def clear(self):
+        entries = [path for _, _, key in self.entries() for path in self._paths(key)]
+        entries += [os.path.join(self.digest_directory, name) for name in os.listdir(self.digest_directory)]
+        for entry in entries:
+            try:
+                os.unlink(entry)
+            except OSError:
+                pass
+        self._digests.clear()
@@ -0,0 +1,217 @@
+import bisect
+import math
+import threading
+
+# Latency buckets in seconds, from sub-millisecond encode times up to a stalled camera.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (5_000, 10_000, 20_000, 40_000, 80_000, 160_000, 320_000, 640_000)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    """A named metric family; labels(...) returns the cached child for one label set.
+
+    Hot paths should hold on to the child (e.g. `frames = FRAMES.labels("0")`)
+    so each update is a single locked add.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values):
+        with self._lock:
+            self._children.pop(tuple(str(value) for value in values), None)
+
+    def remove_matching(self, **labels):
+        """Drop every child whose labels include all of `labels`, e.g. when a session ends."""
+        positions = [(self.labelnames.index(name), str(value))
+                     for name, value in labels.items() if name in self.labelnames]
+        if not positions:
+            return
+        with self._lock:
+            for key in [key for key in self._children if all(key[i] == value for i, value in positions)]:
+                del self._children[key]
+
+    def samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            yield self.name, _format_labels(self.labelnames, key), child.value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            with child.lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))]), cumulative)
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    """Holds metric families plus callbacks that refresh gauges right before a scrape."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for collector in collectors:
+            collector()
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+FRAMES_CAPTURED = Counter("modelbackend_frames_captured_total", "Frames read from the capture source.",
+                          ["session"])
+CAPTURE_FPS = Gauge("modelbackend_capture_fps", "Recent capture frame rate.", ["session"])
+FRAMES_DROPPED = Counter("modelbackend_frames_dropped_total",
+                         "Frames discarded because the named pipeline stage fell behind.", ["session", "stage"])
+INFERENCE_SECONDS = Histogram("modelbackend_inference_seconds", "Time spent in pose.process().", ["session"])
+ENCODE_SECONDS = Histogram("modelbackend_jpeg_encode_seconds", "Time spent encoding one JPEG frame.",
+                           ["session", "profile"])
+DECODE_SECONDS = Histogram("modelbackend_ingest_decode_seconds", "Time spent decoding one uploaded frame.",
+                           ["session"])
+ENCODE_BYTES = Histogram("modelbackend_jpeg_bytes", "Size of encoded JPEG frames.", ["session", "profile"],
+                         buckets=SIZE_BUCKETS)
+FRAME_LATENCY_SECONDS = Histogram("modelbackend_frame_latency_seconds",
+                                  "Capture-to-broadcast latency of delivered frames.", ["session"])
+VIDEO_FEED_CLIENTS = Gauge("modelbackend_video_feed_clients", "Connected /video_feed viewers.", ["session"])
+SOCKET_EMITS = Counter("modelbackend_socket_emits_total", "Socket.IO events emitted.", ["event"])
+REPS_COUNTED = Counter("modelbackend_reps_total", "Reps counted.", ["exercise"])
+ADAPTIVE_LEVEL = Gauge("modelbackend_adaptive_level", "Current inference degradation level (0 = full quality).",
+                       ["session"])
+SESSION_IDLE = Gauge("modelbackend_session_idle", "1 while the session's inference is paused for lack of motion.",
+                     ["session"])
+
+
+class RateMeter:
+    """Frames-per-second estimate from an exponentially weighted inter-arrival time."""
+
+    __slots__ = ("smoothing", "interval", "last")
+
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing
+        self.interval = 0.0
+        self.last = None
+
+    def tick(self, now):
+        if self.last is not None:
+            elapsed = now - self.last
+            if self.interval == 0.0:
+                self.interval = elapsed
+            else:
+                self.interval += self.smoothing * (elapsed - self.interval)
+        self.last = now
+
+    @property
+    def rate(self):
+        return 1.0 / self.interval if self.interval > 0 else 0.0
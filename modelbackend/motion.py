@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+# Inferred frames in a row with nobody found before a session goes idle
+# (about three seconds at TARGET_FPS).
+IDLE_AFTER_FRAMES = 45
+# Frames per second still published to viewers while idle.
+IDLE_FPS = 2.0
+# Width of the grayscale thumbnail motion is measured on.
+MOTION_WIDTH = 64
+
+
+class MotionGate:
+    """Stops pose inference while nobody is in front of the camera.
+
+    observe() is told after every inferred frame whether anybody was found;
+    after `idle_after` empty frames in a row the gate goes idle. While idle,
+    moved() compares each frame, shrunk to a `width`-pixel grayscale
+    thumbnail, against a slowly updated background; when more than
+    `min_changed` of its pixels differ by over `threshold` grey levels the
+    gate wakes, and that same frame is inferred. Meanwhile due() lets
+    through `idle_fps` frames a second so viewers still see the room.
+    """
+
+    def __init__(self, idle_after=IDLE_AFTER_FRAMES, idle_fps=IDLE_FPS, width=MOTION_WIDTH, threshold=25,
+                 min_changed=0.01, learning_rate=0.05):
+        self.idle_after = idle_after
+        self.idle_interval = 1.0 / idle_fps if idle_fps else float("inf")
+        self.width = width
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.learning_rate = learning_rate
+        self.idle = False
+        self._empty = 0
+        self._background = None
+        self._shown = None
+        self.idle_periods = 0
+        self.idle_frames = 0
+        self.gated_frames = 0
+
+    def observe(self, found):
+        """Record whether the last inferred frame found anybody; True when this put the gate to sleep."""
+        if found:
+            self._empty = 0
+            return False
+        self._empty += 1
+        if self.idle or self._empty < self.idle_after:
+            return False
+        self.idle = True
+        self._background = None
+        self._shown = None
+        self.idle_periods += 1
+        return True
+
+    def moved(self, frame):
+        """While idle: whether `frame` shows motion, which wakes the gate."""
+        self.idle_frames += 1
+        height, width = frame.shape[:2]
+        # Striding first keeps the area filter from reading every pixel of a large frame.
+        step = max(1, width // (self.width * 4))
+        small = frame[::step, ::step]
+        size = (self.width, max(1, round(small.shape[0] * self.width / small.shape[1])))
+        small = cv2.cvtColor(cv2.resize(small, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        if self._background is None or self._background.shape != small.shape:
+            self._background = small.astype(np.float32)
+            return False
+        changed = np.count_nonzero(cv2.absdiff(small, cv2.convertScaleAbs(self._background)) > self.threshold)
+        if changed > self.min_changed * small.size:
+            self.idle = False
+            self._empty = 0
+            return True
+        # Follow slow changes such as daylight so they never count as motion.
+        cv2.accumulateWeighted(small, self._background, self.learning_rate)
+        return False
+
+    def due(self, timestamp):
+        """While idle: whether this frame is one of the few still published."""
+        if self._shown is not None and timestamp - self._shown < self.idle_interval:
+            self.gated_frames += 1
+            return False
+        self._shown = timestamp
+        return True
+
+    def stats(self):
+        return {"idle": self.idle, "idle_periods": self.idle_periods, "idle_frames": self.idle_frames,
+                "gated_frames": self.gated_frames}
@@ -0,0 +1,160 @@
+import os
+import logging
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from kinematics import LEFT_HIP, LEFT_SHOULDER, RIGHT_HIP, RIGHT_SHOULDER, landmarks_to_array
+from smoothing import LandmarkSmoother
+
+logger = logging.getLogger(__name__)
+
+# The Tasks PoseLandmarker needs a model bundle that isn't shipped with the
+# code; `python fetch_models.py` downloads it from POSE_LANDMARKER_URL to
+# POSE_LANDMARKER_MODEL (set the env var to keep it elsewhere).
+POSE_LANDMARKER_MODEL = os.environ.get(
+    "POSE_LANDMARKER_MODEL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models",
+                                          "pose_landmarker_full.task"))
+POSE_LANDMARKER_URL = ("https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
+                       "pose_landmarker_full/float16/latest/pose_landmarker_full.task")
+
+# Largest group one session will track.
+MAX_PEOPLE = 8
+
+_TORSO = [LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]
+_CONNECTIONS = np.array(sorted(mp.solutions.pose.POSE_CONNECTIONS))
+
+
+class MultiPoseEstimator:
+    """Every person in a frame from one PoseLandmarker call (MediaPipe Tasks, VIDEO mode).
+
+    process() takes an RGB image and returns a list of (33, 4) x/y/z/visibility
+    arrays, one per detected person, in no particular order; PersonTracker
+    gives them stable IDs.
+    """
+
+    def __init__(self, num_poses, model_path=POSE_LANDMARKER_MODEL):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"PoseLandmarker model not found at {model_path} (run fetch_models.py, "
+                                    f"or set POSE_LANDMARKER_MODEL)")
+        vision = mp.tasks.vision
+        logger.info(f"Loading MediaPipe PoseLandmarker ({model_path}, num_poses={num_poses})")
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=num_poses,
+            min_pose_detection_confidence=0.5,
+            min_pose_presence_confidence=0.5,
+            min_tracking_confidence=0.5)
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+        self._last_ms = -1
+
+    def process(self, image, timestamp):
+        # VIDEO mode requires strictly increasing timestamps.
+        timestamp_ms = max(int(timestamp * 1000), self._last_ms + 1)
+        self._last_ms = timestamp_ms
+        result = self.landmarker.detect_for_video(mp.Image(image_format=mp.ImageFormat.SRGB, data=image),
+                                                  timestamp_ms)
+        return [landmarks_to_array(landmarks) for landmarks in result.pose_landmarks]
+
+    def close(self):
+        self.landmarker.close()
+
+
+class Person:
+    """One tracked person: a stable ID with their own smoother and exercise tracker."""
+
+    __slots__ = ("id", "centroid", "missed", "smoother", "tracker", "points")
+
+    def __init__(self, person_id, centroid, tracker):
+        self.id = person_id
+        self.centroid = centroid
+        self.missed = 0
+        self.smoother = LandmarkSmoother()
+        self.tracker = tracker
+        self.points = None
+
+
+class PersonTracker:
+    """Keeps person IDs stable across frames and routes each person to their own rep counter.
+
+    Detections are matched to tracks by torso centroid (mean of shoulders and
+    hips), greedily from the closest pair, within `max_distance` in
+    normalised image units. Unmatched detections start new tracks up to
+    `max_people`. A track missing for more than `max_missed` frames is
+    dropped; shorter gaps keep its ID and count, and the smoother bridges
+    the first few frames as it does for a single person.
+    """
+
+    def __init__(self, make_tracker, max_people, max_distance=0.2, max_missed=30):
+        self.make_tracker = make_tracker
+        self.max_people = max_people
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.people = []
+        self._next_id = 1
+
+    def reset(self, make_tracker=None):
+        """Give every tracked person a fresh tracker (from `make_tracker` if given), keeping their IDs."""
+        if make_tracker is not None:
+            self.make_tracker = make_tracker
+        for person in self.people:
+            person.tracker = self.make_tracker()
+
+    def update(self, detections, timestamp):
+        """Match one frame's detections; returns the people with smoothed points this frame."""
+        detections = [points for points in detections if not np.isnan(points[0, 0])]
+        centroids = np.array([points[_TORSO, :2].mean(axis=0) for points in detections]).reshape(-1, 2)
+        matched = [None] * len(detections)
+        if self.people and detections:
+            tracked = np.array([person.centroid for person in self.people])
+            distances = np.linalg.norm(tracked[:, None, :] - centroids[None, :, :], axis=-1)
+            taken = set()
+            for flat in np.argsort(distances, axis=None):
+                row, col = divmod(int(flat), len(detections))
+                if distances[row, col] > self.max_distance:
+                    break
+                if row in taken or matched[col] is not None:
+                    continue
+                taken.add(row)
+                matched[col] = self.people[row]
+
+        present = set()
+        for points, centroid, person in zip(detections, centroids, matched):
+            if person is None:
+                if len(self.people) >= self.max_people:
+                    continue
+                person = Person(self._next_id, centroid, self.make_tracker())
+                self._next_id += 1
+                self.people.append(person)
+                logger.info(f"Tracking person {person.id}")
+            person.centroid = centroid
+            person.missed = 0
+            person.points = person.smoother.update(points, timestamp)
+            present.add(person.id)
+
+        for person in self.people:
+            if person.id not in present:
+                person.missed += 1
+                person.points = person.smoother.update(None, timestamp)
+        for person in [p for p in self.people if p.missed > self.max_missed]:
+            logger.info(f"Lost person {person.id}")
+            self.people.remove(person)
+        return [person for person in self.people if person.points is not None]
+
+
+def draw_people(image, people):
+    """Draw each person's skeleton and ID onto a BGR frame; `people` holds result dicts with "points"."""
+    height, width = image.shape[:2]
+    for person in people:
+        xy = person["points"][:, :2] * (width, height)
+        visible = person["points"][:, 3] > 0.5
+        for a, b in _CONNECTIONS:
+            if visible[a] and visible[b]:
+                cv2.line(image, (int(xy[a, 0]), int(xy[a, 1])), (int(xy[b, 0]), int(xy[b, 1])), (245, 66, 230), 2)
+        for x, y in xy[visible]:
+            cv2.circle(image, (int(x), int(y)), 2, (245, 117, 66), -1)
+        x, y = xy[_TORSO[:2]].mean(axis=0)
+        cv2.putText(image, f"#{person['id']}: {person['count']}", (int(x), max(15, int(y) - 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
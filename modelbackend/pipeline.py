@@ -0,0 +1,247 @@
+import queue
+import threading
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Frame buffers a BufferRing cycles through. A buffer is reused only after
+# this many newer frames, which must outnumber every packet that can still
+# be in flight: one queued and one in progress per stage, the output queue,
+# the publisher, and the frame being captured or waiting at the source.
+FRAME_BUFFERS = 12
+
+
+# Passed down the queues after the last frame so each stage finishes its backlog before exiting.
+_END = object()
+
+
+class FramePacket:
+    """One camera frame travelling through the pipeline, plus what each stage adds.
+
+    `timestamp` is the frame's time in seconds for temporal filtering. It is
+    the capture time unless the source supplies its own (e.g. a replayed
+    file's media time, so results don't depend on replay speed).
+    """
+
+    __slots__ = ("seq", "frame", "results", "outputs", "data", "timings", "timestamp")
+
+    def __init__(self, seq, frame, timestamp=None):
+        self.seq = seq
+        self.frame = frame
+        self.results = None
+        self.outputs = {}
+        self.data = {}
+        self.timings = {"capture": time.perf_counter()}
+        self.timestamp = self.timings["capture"] if timestamp is None else timestamp
+
+    @property
+    def latency(self):
+        return time.perf_counter() - self.timings["capture"]
+
+
+class BufferRing:
+    """Round-robin pool of preallocated arrays for frames entering a pipeline.
+
+    next(shape) hands out the next buffer, reallocating it only when the
+    frame size changes, so a steady stream captures or decodes into the same
+    memory over and over instead of allocating a new frame each time. Without
+    a shape it reuses `shape`, the last size seen, and returns None until one
+    is known.
+    """
+
+    def __init__(self, size=FRAME_BUFFERS, dtype=np.uint8):
+        self.dtype = dtype
+        self.shape = None
+        self._buffers = [None] * size
+        self._index = 0
+        self._lock = threading.Lock()
+        self.allocated = 0
+
+    def next(self, shape=None):
+        shape = shape or self.shape
+        if shape is None:
+            return None
+        with self._lock:
+            self.shape = shape
+            index = self._index
+            self._index = (index + 1) % len(self._buffers)
+            buffer = self._buffers[index]
+            if buffer is None or buffer.shape != shape:
+                buffer = self._buffers[index] = np.empty(shape, dtype=self.dtype)
+                self.allocated += 1
+            return buffer
+
+
+class DropQueue:
+    """Bounded hand-off between stages that evicts the oldest item instead of blocking.
+
+    With `block_until` (an Event) it applies backpressure instead: put()
+    waits for room until the event is set. Replays use this to process
+    every frame.
+    """
+
+    def __init__(self, maxsize=1, on_drop=None, block_until=None):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._on_drop = on_drop
+        self._block_until = block_until
+        self.dropped = 0
+
+    def put(self, item):
+        if self._block_until is not None:
+            while not self._block_until.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                    if self._on_drop is not None:
+                        self._on_drop()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+
+class FramePipeline:
+    """Runs capture and each processing stage on its own thread.
+
+    `read_frame` returns the next frame (or a FramePacket, to set its
+    timestamp), or None when the source is exhausted; frames already in
+    flight are still finished. `stages` is a list of (name, fn) pairs; each
+    fn takes a FramePacket and returns it (possibly modified) or None to
+    discard it. Stages are linked by DropQueues, so a slow stage only loses
+    frames instead of stalling the ones before it, and throughput follows
+    the slowest stage. `on_drop(stage_name)` is called whenever a frame
+    waiting for that stage is discarded. With `lossless=True` nothing is
+    dropped and capture slows down to the slowest stage instead.
+    """
+
+    def __init__(self, read_frame, stages, queue_size=1, poll_interval=0.1, name="pipeline", on_drop=None,
+                 lossless=False):
+        self.name = name
+        self._read_frame = read_frame
+        self._stages = list(stages)
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        stage_names = [stage_name for stage_name, _ in self._stages] + ["output"]
+        self._queues = [DropQueue(queue_size, on_drop=(lambda stage_name=stage_name: on_drop(stage_name))
+                                  if on_drop else None, block_until=self._stop if lossless else None)
+                        for stage_name in stage_names]
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self._seq = 0
+        self.stage_seconds = {stage_name: 0.0 for stage_name, _ in self._stages}
+        self.stage_calls = {stage_name: 0 for stage_name, _ in self._stages}
+        self.delivered = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+
+    @property
+    def output(self):
+        return self._queues[-1]
+
+    def start(self):
+        self._threads.append(threading.Thread(target=self._capture_loop,
+                                              name=f"{self.name}-capture", daemon=True))
+        for index, (stage_name, fn) in enumerate(self._stages):
+            self._threads.append(threading.Thread(target=self._stage_loop,
+                                                  args=(stage_name, fn, self._queues[index], self._queues[index + 1]),
+                                                  name=f"{self.name}-{stage_name}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def _capture_loop(self):
+        try:
+            while not self._stop.is_set():
+                frame = self._read_frame()
+                if frame is None:
+                    logger.info(f"{self.name}: frame source exhausted")
+                    break
+                self._seq += 1
+                if isinstance(frame, FramePacket):
+                    frame.seq = self._seq
+                    self._queues[0].put(frame)
+                else:
+                    self._queues[0].put(FramePacket(self._seq, frame))
+        except Exception as e:
+            logger.error(f"{self.name}: capture failed: {e}")
+        finally:
+            self._queues[0].put(_END)
+
+    def _stage_loop(self, stage_name, fn, inbox, outbox):
+        while not self._stop.is_set():
+            try:
+                packet = inbox.get(timeout=self._poll_interval)
+            except queue.Empty:
+                continue
+            if packet is _END:
+                outbox.put(_END)
+                return
+            started = time.perf_counter()
+            try:
+                packet = fn(packet)
+            except Exception as e:
+                logger.error(f"{self.name}: error in {stage_name} stage: {e}")
+                packet = None
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self.stage_seconds[stage_name] += finished - started
+                self.stage_calls[stage_name] += 1
+            if packet is not None:
+                packet.timings[stage_name] = finished
+                outbox.put(packet)
+
+    def packets(self):
+        """Yield finished packets until the pipeline stops."""
+        while not self._stop.is_set():
+            try:
+                packet = self.output.get(timeout=self._poll_interval)
+            except queue.Empty:
+                continue
+            if packet is _END:
+                self._stop.set()
+                return
+            latency = packet.latency
+            with self._stats_lock:
+                self.delivered += 1
+                self.last_latency = latency
+                self.total_latency += latency
+            yield packet
+
+    def stats(self):
+        with self._stats_lock:
+            delivered = self.delivered
+            return {
+                "captured": self._seq,
+                "delivered": delivered,
+                "dropped": {stage_name: q.dropped
+                            for (stage_name, _), q in zip(self._stages + [("output", None)], self._queues)},
+                "last_latency_ms": self.last_latency * 1000,
+                "avg_latency_ms": (self.total_latency / delivered * 1000) if delivered else 0.0,
+                "stage_ms": {stage_name: (self.stage_seconds[stage_name] / calls * 1000) if calls else 0.0
+                             for stage_name, calls in self.stage_calls.items()},
+            }
@@ -0,0 +1,120 @@
+import collections
+import math
+
+# Rep records kept per tracker for the session API.
+DEFAULT_HISTORY = 50
+
+
+class RepAnalyzer:
+    """Per-rep tempo and range-of-motion records, updated alongside RepCounter.
+
+    A rep cycle runs from the last frame at the top of the extended stage
+    (angle above `extend_above`), through the flexed stage, to the return to
+    the extended stage. For exercises counted on extension (squat, push-up)
+    the closing transition is the count itself; for those counted on flexion
+    (pull-up, crunch, curl) the record closes half a rep after the count,
+    once the eccentric phase is known. The concentric phase is the movement
+    toward the counting transition: rising angle when counted on extension,
+    falling when counted on flexion.
+
+    An excursion that drops below `partial_below` (a spec option, default
+    halfway between the thresholds) but returns to the top without reaching
+    `flex_below` produces an uncounted record with `partial` set.
+
+    update() only compares and stores a few scalars, and records go into a
+    bounded deque, so the per-frame cost is constant.
+    """
+
+    __slots__ = ("extend_above", "partial_below", "count_on_flex", "records", "origin",
+                 "top_time", "low_angle", "low_time", "high_angle", "in_rep", "pending_count")
+
+    def __init__(self, spec, history=DEFAULT_HISTORY):
+        self.extend_above = float(spec["extend_above"])
+        self.partial_below = float(spec.get("partial_below", (spec["flex_below"] + spec["extend_above"]) / 2))
+        self.count_on_flex = spec["count_on"] == "flex"
+        self.records = collections.deque(maxlen=history)
+        self.origin = None
+        self.top_time = None
+        self.in_rep = False
+        self.pending_count = None
+        self._reset_extremes()
+
+    def _reset_extremes(self):
+        self.low_angle = math.inf
+        self.low_time = None
+        self.high_angle = -math.inf
+
+    def update(self, timestamp, angle, flexed, was_flexed, count):
+        """Feed one frame after RepCounter.update(); returns a finished record or None.
+
+        `flexed`/`was_flexed` are the counter's stage after and before this
+        frame, `count` its count after it.
+        """
+        if math.isnan(angle):
+            return None
+        if self.origin is None:
+            self.origin = timestamp
+
+        if flexed and not was_flexed:
+            # Left the top for real: this is a rep, not just an excursion.
+            self.in_rep = True
+            if self.count_on_flex:
+                self.pending_count = count
+
+        if not flexed and angle > self.extend_above:
+            record = None
+            if was_flexed and self.in_rep and self.top_time is not None:
+                record = self._record(timestamp, angle, count if not self.count_on_flex else self.pending_count)
+            elif not was_flexed and self.low_angle < self.partial_below and self.top_time is not None:
+                record = self._record(timestamp, angle, None)
+            self.top_time = timestamp
+            self.high_angle = angle
+            self.low_angle = math.inf
+            self.low_time = None
+            self.in_rep = False
+            if record is not None:
+                self.records.append(record)
+            return record
+
+        if angle < self.low_angle:
+            self.low_angle = angle
+            self.low_time = timestamp
+        if angle > self.high_angle:
+            self.high_angle = angle
+        return None
+
+    def _record(self, end, end_angle, count):
+        start, bottom = self.top_time, self.low_time if self.low_time is not None else end
+        high = max(self.high_angle, end_angle)
+        down, up = bottom - start, end - bottom
+        concentric, eccentric = (down, up) if self.count_on_flex else (up, down)
+        return {
+            "rep": count,
+            "partial": count is None,
+            "start_s": round(start - self.origin, 3),
+            "bottom_s": round(bottom - self.origin, 3),
+            "end_s": round(end - self.origin, 3),
+            "duration_s": round(end - start, 3),
+            "concentric_s": round(concentric, 3),
+            "eccentric_s": round(eccentric, 3),
+            "min_angle": round(self.low_angle, 1),
+            "max_angle": round(high, 1),
+            "range_of_motion": round(high - self.low_angle, 1),
+        }
+
+    def summary(self):
+        """Averages over the counted reps still in the history."""
+        counted = [record for record in self.records if not record["partial"]]
+        partial = len(self.records) - len(counted)
+        if not counted:
+            return {"reps": 0, "partial_reps": partial}
+        n = len(counted)
+        return {
+            "reps": n,
+            "partial_reps": partial,
+            "avg_duration_s": round(sum(r["duration_s"] for r in counted) / n, 3),
+            "avg_concentric_s": round(sum(r["concentric_s"] for r in counted) / n, 3),
+            "avg_eccentric_s": round(sum(r["eccentric_s"] for r in counted) / n, 3),
+            "avg_range_of_motion": round(sum(r["range_of_motion"] for r in counted) / n, 1),
+            "min_angle": min(r["min_angle"] for r in counted),
+        }
@@ -0,0 +1,78 @@
+import math
+
+DEFAULT_HYSTERESIS = 0.0
+DEFAULT_MIN_DWELL = 1
+
+
+class RepCounter:
+    """Two-stage rep state machine driven by one joint angle per frame.
+
+    The spec (an entry of exercises.EXERCISES) gives the thresholds and stage
+    names: the counter moves to `flexed_stage` once the angle has stayed below
+    `flex_below` for `min_dwell` frames, and back to `extended_stage` once it
+    has stayed above `extend_above` for as long. While a transition is pending
+    the angle may drift back by up to `hysteresis` degrees past the threshold
+    without resetting the dwell count, so jitter around a threshold neither
+    adds nor loses reps. `count_on` picks which transition completes a rep.
+
+    update() only touches a handful of scalars, so it can be driven from
+    synthetic angle streams without OpenCV or MediaPipe.
+    """
+
+    __slots__ = ("flex_below", "extend_above", "hysteresis", "min_dwell", "count_on_flex",
+                 "flexed_stage", "extended_stage", "start_flexed", "flexed", "pending", "count")
+
+    def __init__(self, spec):
+        self.flex_below = float(spec["flex_below"])
+        self.extend_above = float(spec["extend_above"])
+        self.hysteresis = float(spec.get("hysteresis", DEFAULT_HYSTERESIS))
+        self.min_dwell = max(1, int(spec.get("min_dwell", DEFAULT_MIN_DWELL)))
+        self.count_on_flex = spec["count_on"] == "flex"
+        self.flexed_stage = spec["flexed_stage"]
+        self.extended_stage = spec["extended_stage"]
+        self.start_flexed = spec["start_stage"] == self.flexed_stage
+        self.reset()
+
+    def reset(self):
+        self.flexed = self.start_flexed
+        self.pending = 0
+        self.count = 0
+
+    @property
+    def stage(self):
+        return self.flexed_stage if self.flexed else self.extended_stage
+
+    def update(self, angle):
+        """Feed one angle in degrees; returns True when it completes a rep.
+
+        NaN (no usable landmarks this frame) leaves the state untouched.
+        """
+        if math.isnan(angle):
+            return False
+
+        if self.flexed:
+            if angle > self.extend_above:
+                self.pending += 1
+            elif self.pending and angle > self.extend_above - self.hysteresis:
+                return False
+            else:
+                self.pending = 0
+                return False
+        else:
+            if angle < self.flex_below:
+                self.pending += 1
+            elif self.pending and angle < self.flex_below + self.hysteresis:
+                return False
+            else:
+                self.pending = 0
+                return False
+
+        if self.pending < self.min_dwell:
+            return False
+
+        self.flexed = not self.flexed
+        self.pending = 0
+        if self.flexed == self.count_on_flex:
+            self.count += 1
+            return True
+        return False
@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+
+# Side of the square image pose runs on while cropping; MediaPipe's landmark
+# model itself works at 256x256, so a larger crop buys no precision.
+ROI_INPUT_SIZE = 256
+
+
+class RegionOfInterest:
+    """Crops pose input to where the person was in the previous frame.
+
+    update() takes full-frame landmarks and keeps a square box around the
+    visible ones, widened by `margin` on every side. While there is a box,
+    crop() cuts it out of the frame and resizes it to `input_size` square,
+    so pose sees a small image at a fixed size (far-away users are enlarged
+    rather than shrunk), and to_frame() maps the landmarks it finds back to
+    full-frame coordinates. The box is dropped, and the next frame runs on
+    the full image, when nobody is found, too few landmarks are visible, or
+    the box would cover most of the frame anyway.
+    """
+
+    def __init__(self, margin=0.4, input_size=ROI_INPUT_SIZE, min_visible=8, max_fraction=0.8):
+        self.margin = margin
+        self.input_size = input_size
+        self.min_visible = min_visible
+        self.max_fraction = max_fraction
+        # (x, y, side) in pixels of the current box, and the frame size it was made for.
+        self.box = None
+        self.frame_size = None
+        self.cropped = 0
+        self.full = 0
+
+    def crop(self, frame, dst):
+        """The box resized into `dst` (input_size square), or None to run on the full frame."""
+        height, width = frame.shape[:2]
+        if self.box is None or self.frame_size != (width, height):
+            self.box = None
+            self.full += 1
+            return None
+        x, y, side = self.box
+        self.cropped += 1
+        return cv2.resize(frame[y:y + side, x:x + side], (self.input_size, self.input_size), dst=dst,
+                          interpolation=cv2.INTER_AREA if side > self.input_size else cv2.INTER_LINEAR)
+
+    def to_frame(self, points):
+        """Map landmarks found in the crop back to full-frame normalised coordinates, in place."""
+        x, y, side = self.box
+        width, height = self.frame_size
+        points[:, 0] = (x + points[:, 0] * side) / width
+        points[:, 1] = (y + points[:, 1] * side) / height
+        # MediaPipe's z is on the same scale as x.
+        points[:, 2] *= side / width
+        return points
+
+    def update(self, points, frame_shape):
+        """Set the next frame's box from this frame's full-frame landmarks (None when nobody was found)."""
+        height, width = frame_shape[:2]
+        box, self.box = self.box, None
+        if self.frame_size != (width, height):
+            box = None
+        self.frame_size = (width, height)
+        if points is None:
+            return
+        visible = points[:, 3] > 0.5
+        if visible.sum() < self.min_visible:
+            return
+        xs = points[visible, 0] * width
+        ys = points[visible, 1] * height
+        extent = max(xs.max() - xs.min(), ys.max() - ys.min())
+        if box is not None:
+            # Keep the box while the person stays well inside it and still
+            # fills a fair part of it: MediaPipe tracks from frame to frame in
+            # input coordinates, and every move of the crop shifts those.
+            x, y, side = box
+            inset = extent * self.margin / 2
+            if (x + inset <= xs.min() and xs.max() <= x + side - inset and y + inset <= ys.min()
+                    and ys.max() <= y + side - inset and extent * (1 + 4 * self.margin) >= side):
+                self.box = box
+                return
+        side = extent * (1 + 2 * self.margin)
+        if side >= min(width, height) or side * side >= self.max_fraction * width * height:
+            return
+        side = int(np.ceil(side))
+        # Centre the box on the person, shifted inside the frame where it would overhang.
+        x = int(min(max((xs.max() + xs.min() - side) / 2, 0), width - side))
+        y = int(min(max((ys.max() + ys.min() - side) / 2, 0), height - side))
+        self.box = (x, y, side)
+
+    def stats(self):
+        return {"cropped_frames": self.cropped, "full_frames": self.full,
+                "box": list(self.box) if self.box is not None else None}
@@ -0,0 +1,95 @@
+import signal
+
+try:
+    import gevent
+    from gevent.event import Event
+except ImportError:
+    gevent = None
+
+
+class GeventWaiter:
+    """Lets a greenlet sleep until another OS thread calls wake().
+
+    A greenlet can't wait on a threading.Condition without blocking every
+    other greenlet on its hub, so frame threads signal it through the hub's
+    async watcher instead, which is safe to send() from any thread.
+    """
+
+    def __init__(self):
+        self._event = Event()
+        self._watcher = gevent.get_hub().loop.async_()
+        self._watcher.start(self._event.set)
+
+    def wake(self):
+        self._watcher.send()
+
+    def clear(self):
+        self._event.clear()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def close(self):
+        self._watcher.close()
+
+
+class Runtime:
+    """How request handlers share the process with the frame threads, per Socket.IO async mode.
+
+    "threading" is the Werkzeug development server: one OS thread per
+    connection, so handlers may block freely. "gevent" serves every HTTP
+    stream and Socket.IO connection from greenlets on one OS thread; the
+    capture, pipeline and inference threads stay real threads (nothing is
+    monkey-patched), and handlers hand anything that blocks to the hub's
+    thread pool with blocking() or offload(), or wait for frames through a
+    waiter(). "auto" picks gevent when it is installed.
+    """
+
+    def __init__(self, async_mode="auto"):
+        if async_mode == "auto":
+            async_mode = "gevent" if gevent is not None else "threading"
+        if async_mode not in ("gevent", "threading"):
+            raise ValueError(f"Unsupported async mode '{async_mode}' (use 'gevent', 'threading' or 'auto')")
+        if async_mode == "gevent" and gevent is None:
+            raise ValueError("The gevent async mode needs gevent installed")
+        self.async_mode = async_mode
+
+    @property
+    def cooperative(self):
+        return self.async_mode == "gevent"
+
+    def handle_signal(self, signum, handler):
+        """Call handler(signum) on `signum`; under gevent it runs in the hub, where it may spawn greenlets."""
+        if self.cooperative:
+            gevent.signal_handler(signum, handler, signum)
+        else:
+            signal.signal(signum, lambda signum, frame: handler(signum))
+
+    def waiter(self):
+        """A GeventWaiter for FrameHub.subscribe(), or None to wait on the hub's condition."""
+        return GeventWaiter() if self.cooperative else None
+
+    def blocking(self, fn, *args, **kwargs):
+        """Call `fn` where it can block (camera opens, thread joins, decodes) without stalling other clients."""
+        if not self.cooperative:
+            return fn(*args, **kwargs)
+        return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+
+    def offload(self, iterator):
+        """Iterate `iterator` on the thread pool; for generators that block between items (e.g. on ffmpeg)."""
+        if not self.cooperative:
+            return iterator
+        return self._offload(iterator)
+
+    def _offload(self, iterator):
+        end = object()
+        try:
+            while True:
+                item = self.blocking(next, iterator, end)
+                if item is end:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                self.blocking(close)
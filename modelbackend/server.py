@@ -0,0 +1,391 @@
+from flask import Flask, jsonify, Response, request
+from flask_cors import CORS
+from flask_socketio import SocketIO, join_room, leave_room
+import logging
+import os
+import signal
+import threading
+import time
+
+from exercises import EXERCISES, resolve_exercise
+from emitter import TelemetryEmitter
+from broadcast import MJPEG_BOUNDARY
+from encoders import DEFAULT_PROFILE, PROFILES, ffmpeg_available, h264_stream
+from sessions import DEFAULT_SESSION, TARGET_FPS, SessionError, SessionRegistry, create_pose
+from ingest import MAX_FRAME_BYTES, IngestError, parse_timestamp
+from inference_pool import PoseWorkerPool
+from people import MAX_PEOPLE
+from runtime import Runtime
+import metrics
+from metrics import ADAPTIVE_LEVEL, CAPTURE_FPS, SESSION_IDLE, VIDEO_FEED_CLIENTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "gevent" serves every video feed and Socket.IO connection from greenlets
+# (the production mode); "threading" is the Werkzeug development server;
+# "auto" uses gevent when it is installed. See runtime.Runtime.
+ASYNC_MODE = os.environ.get("ASYNC_MODE", "auto")
+HOST = os.environ.get("HOST", "127.0.0.1")
+PORT = int(os.environ.get("PORT", "5000"))
+# Flask debug mode (tracebacks in responses) for the threading server; off unless DEBUG=1.
+DEBUG = os.environ.get("DEBUG", "0").lower() in ("1", "true", "yes")
+# Seconds open connections get to finish after SIGTERM before they are closed.
+SHUTDOWN_TIMEOUT = 5.0
+
+runtime = Runtime(ASYNC_MODE)
+
+app = Flask(__name__)
+# Bodies over the upload limit are refused with a 413 instead of being read.
+app.config["MAX_CONTENT_LENGTH"] = MAX_FRAME_BYTES
+CORS(app, resources={
+    r"/*": {
+        "origins": "*",
+        "methods": ["GET", "POST", "OPTIONS"],
+        "allow_headers": ["Content-Type", "X-Session-ID"]
+    }
+})
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=runtime.async_mode)
+emitter = TelemetryEmitter(socketio)
+
+default_exercise = "squat"
+
+# How many sessions one node serves at once, and how long a session may sit
+# with no viewers and no API calls before it is stopped and dropped.
+MAX_SESSIONS = 4
+SESSION_IDLE_TIMEOUT = 120.0
+
+# Group sessions (?people=N) load MediaPipe's PoseLandmarker bundle from
+# people.POSE_LANDMARKER_MODEL: models/pose_landmarker_full.task next to this
+# file, or wherever the POSE_LANDMARKER_MODEL env var points. It isn't shipped
+# with the code; `python fetch_models.py` downloads it.
+
+# "opencv", "simplejpeg", or "auto" (simplejpeg when it is installed).
+JPEG_BACKEND = "auto"
+
+# Pose inference worker processes shared by all sessions; 0 runs inference on
+# each session's own thread in this process. The web server itself is always
+# one process: sessions hold cameras and counts in memory.
+POSE_WORKERS = int(os.environ.get("POSE_WORKERS", "0"))
+
+inference_pool = PoseWorkerPool(POSE_WORKERS) if POSE_WORKERS > 0 else None
+sessions = SessionRegistry(emitter, max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT,
+                           jpeg_backend=JPEG_BACKEND, inference_pool=inference_pool)
+
+
+def exercise_from_request():
+    """The ?exercise= asked for, or None when the request doesn't name one.
+
+    Callers fall back to the session's own exercise, and to default_exercise
+    only for a new session, so a request without ?exercise= never switches
+    (and zeroes) a running session.
+    """
+    name = request.args.get("exercise")
+    if not name:
+        return None, None
+    exercise = resolve_exercise(name)
+    if exercise is None:
+        return None, (jsonify({"error": f"Unknown exercise '{name}'",
+                               "exercises": sorted(EXERCISES)}), 400)
+    return exercise, None
+
+
+def session_id_from_request():
+    return request.args.get("session") or request.headers.get("X-Session-ID") or DEFAULT_SESSION
+
+
+def session_error(e):
+    return jsonify({"error": str(e)}), e.status
+
+
+def room_from_message(data):
+    data = data or {}
+    if data.get("session"):
+        return f"session-{data['session']}"
+    return data.get("room")
+
+
+def collect_session_metrics():
+    for session in sessions.all():
+        VIDEO_FEED_CLIENTS.labels(session.id).set(session.viewers)
+        CAPTURE_FPS.labels(session.id).set(round(session.capture_rate.rate, 2) if session.running else 0.0)
+        ADAPTIVE_LEVEL.labels(session.id).set(session.adaptive.level)
+        SESSION_IDLE.labels(session.id).set(1 if session.motion is not None and session.motion.idle else 0)
+
+
+metrics.REGISTRY.add_collector(collect_session_metrics)
+
+
+def generate_frames(hub):
+    # Parts arrive already framed, so each viewer yields them without copying.
+    yield from hub.subscribe(waiter=runtime.waiter())
+
+
+@app.route('/video_feed')
+def video_feed():
+    """MJPEG by default; ?codec=h264 streams fragmented MP4, ?mode=landmarks streams
+    newline-delimited JSON landmarks for clients that draw over their own preview.
+    ?profile= picks the quality/resolution profile."""
+    exercise, error = exercise_from_request()
+    if error:
+        return error
+    camera_index = request.args.get("camera", 0, type=int)
+    profile = request.args.get("profile", DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        return jsonify({"error": f"Unknown profile '{profile}'", "profiles": sorted(PROFILES)}), 400
+    mode = request.args.get("mode", "video")
+    codec = request.args.get("codec", "jpeg")
+    if mode not in ("video", "landmarks") or codec not in ("jpeg", "h264"):
+        return jsonify({"error": "mode must be 'video' or 'landmarks' and codec 'jpeg' or 'h264'"}), 400
+    if mode == "video" and codec == "h264" and not ffmpeg_available():
+        return jsonify({"error": "H.264 streaming needs ffmpeg on the server"}), 501
+    try:
+        session = sessions.get_or_create(session_id_from_request(), exercise or default_exercise, camera_index)
+        if session.stop_event.is_set():
+            return jsonify({"error": f"Session '{session.id}' is stopped; call /start-counting"}), 409
+        if exercise is not None:
+            session.set_exercise(exercise)
+        runtime.blocking(session.start)
+    except SessionError as e:
+        return session_error(e)
+    if mode == "landmarks":
+        return Response(generate_frames(session.feed("landmarks")), mimetype="application/x-ndjson")
+    if codec == "h264":
+        crf = PROFILES[profile]["crf"]
+        # ffmpeg's output is read with blocking pipe reads.
+        return Response(runtime.offload(h264_stream(session.feed("raw", profile).subscribe(), TARGET_FPS, crf)),
+                        mimetype="video/mp4")
+    return Response(generate_frames(session.feed("jpeg", profile)),
+                    mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}')
+
+
+@socketio.on("join")
+def join(data):
+    # Telemetry is sent per session room; a dashboard joins with {"session": "<id>"}.
+    room = room_from_message(data)
+    if room:
+        join_room(room)
+
+
+@socketio.on("leave")
+def leave(data):
+    room = room_from_message(data)
+    if room:
+        leave_room(room)
+
+
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    """Accept one client frame for a camera-less session.
+
+    The body is a JPEG (image/jpeg), 33x4 little-endian float32 landmarks
+    (application/octet-stream), or JSON {"landmarks": [[x, y, z, visibility], ...]}.
+    Group sessions (?people=N at /start-counting) take up to N people's
+    landmarks back to back. The client's capture time in seconds goes in
+    ?timestamp= (or a JSON "timestamp" field); without it frames are timed
+    by arrival.
+    """
+    if request.content_length is not None and request.content_length > MAX_FRAME_BYTES:
+        return jsonify({"error": f"Upload of {request.content_length} bytes exceeds the "
+                                 f"{MAX_FRAME_BYTES} byte limit"}), 413
+    exercise, error = exercise_from_request()
+    if error:
+        return error
+    try:
+        timestamp = parse_timestamp(request.args.get("timestamp"))
+        session = sessions.get_or_create(session_id_from_request(), exercise or default_exercise, ingest=True)
+        if exercise is not None:
+            session.set_exercise(exercise)
+        if request.mimetype == "application/json":
+            body = request.get_json(silent=True) or {}
+            if "landmarks" not in body:
+                return jsonify({"error": "JSON uploads must carry 'landmarks'"}), 400
+            if "timestamp" in body:
+                timestamp = parse_timestamp(body["timestamp"])
+            result = runtime.blocking(session.ingest, landmarks=body["landmarks"], timestamp=timestamp)
+        elif request.mimetype == "application/octet-stream":
+            result = runtime.blocking(session.ingest, landmarks=request.get_data(cache=False), timestamp=timestamp)
+        else:
+            result = runtime.blocking(session.ingest, jpeg=request.get_data(cache=False), timestamp=timestamp)
+        return jsonify(result), 200
+    except (SessionError, IngestError) as e:
+        return session_error(e)
+
+
+@socketio.on("frame")
+def ingest_frame(data):
+    # {"session": id, "exercise": name, "jpeg": <binary>} or {..., "landmarks": <binary or list>},
+    # optionally with "timestamp" (client capture time in seconds).
+    # The return value is sent back as the Socket.IO acknowledgement.
+    data = data or {}
+    exercise = resolve_exercise(data["exercise"]) if data.get("exercise") else None
+    if data.get("exercise") and exercise is None:
+        return {"error": f"Unknown exercise '{data.get('exercise')}'"}
+    try:
+        timestamp = parse_timestamp(data.get("timestamp"))
+        session = sessions.get_or_create(data.get("session") or DEFAULT_SESSION, exercise or default_exercise,
+                                         ingest=True)
+        if exercise is not None:
+            session.set_exercise(exercise)
+        if data.get("jpeg") is not None:
+            return runtime.blocking(session.ingest, jpeg=data["jpeg"], timestamp=timestamp)
+        if data.get("landmarks") is not None:
+            return runtime.blocking(session.ingest, landmarks=data["landmarks"], timestamp=timestamp)
+        return {"error": "Frame messages must carry 'jpeg' or 'landmarks'"}
+    except (SessionError, IngestError) as e:
+        return {"error": str(e)}
+
+
+@app.route("/start-counting", methods=["GET"])
+def start_counting():
+    exercise, error = exercise_from_request()
+    if error:
+        return error
+    camera_index = request.args.get("camera", 0, type=int)
+    # ?source=upload creates a camera-less session fed through /ingest or the "frame" event.
+    upload = request.args.get("source") == "upload"
+    # ?people=N counts for up to N people in one camera (new sessions only).
+    max_people = request.args.get("people", 1, type=int)
+    if not 1 <= max_people <= MAX_PEOPLE:
+        return jsonify({"error": f"people must be between 1 and {MAX_PEOPLE}"}), 400
+    try:
+        session = sessions.get_or_create(session_id_from_request(), exercise or default_exercise, camera_index,
+                                         ingest=upload, max_people=max_people)
+        # Without ?exercise= an existing session restarts on the exercise it was counting.
+        exercise = exercise or session.exercise
+        logger.info(f"Starting {exercise} counting session '{session.id}'")
+        session.reset(exercise)
+        return jsonify({"message": f"{EXERCISES[exercise]['label']} counter started", "exercise": exercise,
+                        "session": session.id, "room": session.room}), 200
+    except SessionError as e:
+        return session_error(e)
+    except Exception as e:
+        logger.error(f"Error starting {exercise or default_exercise} counter: {e}")
+        return jsonify({"error": f"Failed to start {exercise or default_exercise} counter"}), 500
+
+
+@app.route("/stop-counting", methods=["GET"])
+def stop_counting():
+    exercise, error = exercise_from_request()
+    if error:
+        return error
+    session_id = session_id_from_request()
+    try:
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": f"Unknown session '{session_id}'"}), 404
+        exercise = exercise or session.exercise
+        label = EXERCISES[exercise]["label"]
+        logger.info(f"Stopping {exercise} counting session '{session.id}'")
+        runtime.blocking(session.stop)
+        return jsonify({"message": f"{label} counter stopped", "exercise": exercise, "session": session.id}), 200
+    except Exception as e:
+        logger.error(f"Error stopping {exercise} counter: {e}")
+        return jsonify({"error": f"Failed to stop {exercise} counter"}), 500
+
+
+@app.route("/last-session", methods=["GET"])
+def last_session():
+    exercise, error = exercise_from_request()
+    if error:
+        return error
+    session_id = session_id_from_request()
+    session = sessions.get(session_id)
+    exercise = exercise or (session.exercise if session is not None else default_exercise)
+    count = session.last_count(exercise) if session is not None else 0
+    result = {EXERCISES[exercise]["session_key"]: count, "exercise": exercise, "session": session_id}
+    if session is not None and session.people is not None:
+        # Group sessions report the total above and each person's count here.
+        result["people"] = [{"id": person_id, "count": person_count}
+                            for person_id, person_count in sorted(session.last_person_count(exercise).items())]
+    return jsonify(result), 200
+
+
+@app.route("/reps", methods=["GET"])
+def rep_history():
+    # Per-rep tempo and range of motion for the session's current exercise (also pushed live as "rep" events).
+    session_id = session_id_from_request()
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": f"Unknown session '{session_id}'"}), 404
+    return jsonify(session.reps()), 200
+
+
+@app.route("/pipeline-stats", methods=["GET"])
+def pipeline_stats():
+    return jsonify({"pipelines": [session.stats() for session in sessions.all()],
+                    "max_sessions": sessions.max_sessions,
+                    "inference_pool": inference_pool.stats() if inference_pool is not None else None}), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype=metrics.CONTENT_TYPE)
+
+
+@app.route("/exercises", methods=["GET"])
+def list_exercises():
+    return jsonify({"default": default_exercise, "exercises": sorted(EXERCISES),
+                    "profiles": PROFILES, "h264": ffmpeg_available()}), 200
+
+
+def shutdown():
+    """Stop every session (releasing its camera and ending its feeds) and the inference workers."""
+    sessions.stop_reaper()
+    sessions.close_all()
+    emitter.stop()
+    if inference_pool is not None:
+        inference_pool.close()
+
+
+def stop_server(signum):
+    logger.info(f"Received {signal.Signals(signum).name}; shutting down")
+    if not runtime.cooperative:
+        # Werkzeug's serve_forever() returns on KeyboardInterrupt, and run() then cleans up.
+        raise KeyboardInterrupt
+
+    def stop():
+        # Ending the feeds first lets streaming responses finish instead of being cut off.
+        runtime.blocking(sessions.close_all)
+        socketio.wsgi_server.stop(timeout=SHUTDOWN_TIMEOUT)
+
+    socketio.start_background_task(stop)
+
+
+def run(exercise=None, host=HOST, port=PORT):
+    global default_exercise
+    if exercise is not None:
+        default_exercise = resolve_exercise(exercise) or default_exercise
+    try:
+        # Pay the model's cold start before the first request instead of during it.
+        create_pose().close()
+        if inference_pool is not None:
+            inference_pool.start()
+        # Background tasks must start on the server's own thread under gevent.
+        emitter.start()
+        if runtime.cooperative:
+            # Evicting joins session threads, which would stall every greenlet.
+            sessions.start_reaper(lambda reap: threading.Thread(target=reap, name="session-reaper",
+                                                                daemon=True).start(), time.sleep)
+            runtime.handle_signal(signal.SIGINT, stop_server)
+            runtime.handle_signal(signal.SIGTERM, stop_server)
+            logger.info(f"Serving on {host}:{port} with gevent (default exercise: {default_exercise})")
+            socketio.run(app, host=host, port=port)
+        else:
+            if ASYNC_MODE == "auto":
+                logger.warning("gevent is not installed; falling back to the Werkzeug development server, "
+                               "which uses a thread per connection and is not meant for production "
+                               "(pip install gevent)")
+            sessions.start_reaper(socketio.start_background_task, socketio.sleep)
+            runtime.handle_signal(signal.SIGTERM, stop_server)
+            logger.info(f"Starting Flask-SocketIO development server on {host}:{port} "
+                        f"(default exercise: {default_exercise}, debug {'on' if DEBUG else 'off'})")
+            socketio.run(app, host=host, port=port, debug=DEBUG, allow_unsafe_werkzeug=True, use_reloader=False)
+    except Exception as e:
+        logger.error(f"Server error: {e}")
+    finally:
+        shutdown()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,819 @@
+import json
+import re
+import threading
+import time
+import logging
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from exercises import EXERCISES
+from kinematics import ANGLE_INDEX, JOINT_ANGLES, angle_sides, joint_angles, landmarks_to_array
+from rep_counter import RepCounter
+from rep_analytics import RepAnalyzer
+from pipeline import BufferRing, FramePipeline
+from broadcast import FrameHub, mjpeg_part
+from encoders import DEFAULT_PROFILE, PROFILES, Rescaler, create_jpeg_encoder
+from adaptive import AdaptiveController
+from smoothing import LandmarkSmoother
+from ingest import IngestSource
+from people import MultiPoseEstimator, PersonTracker, draw_people
+from inference_pool import LandmarkResult
+from roi import RegionOfInterest
+from motion import MotionGate
+from sources import CameraSource, Landmarks
+import metrics
+from metrics import (DECODE_SECONDS, ENCODE_BYTES, ENCODE_SECONDS, FRAME_LATENCY_SECONDS, FRAMES_CAPTURED,
+                     FRAMES_DROPPED, INFERENCE_SECONDS, REPS_COUNTED, RateMeter)
+
+logger = logging.getLogger(__name__)
+
+mp_drawing = mp.solutions.drawing_utils
+mp_pose = mp.solutions.pose
+
+# Sessions that don't name themselves (the original single-user dashboard)
+# share this ID, and their counter events are broadcast to every client.
+DEFAULT_SESSION = "default"
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# Frame rate each session tries to hold by degrading inference; 0 disables it.
+TARGET_FPS = 15
+
+# Run single-person pose on a crop around the previous frame's landmarks (see roi.RegionOfInterest).
+ROI_CROPPING = True
+
+# Skip inference while nobody is in front of the camera (see motion.MotionGate).
+IDLE_GATING = True
+
+
+class SessionError(Exception):
+    status = 400
+
+
+class SessionLimitError(SessionError):
+    status = 429
+
+
+class SessionConflictError(SessionError):
+    status = 409
+
+
+class CaptureError(SessionError):
+    status = 503
+
+
+class ModelUnavailableError(SessionError):
+    status = 503
+
+
+def create_pose(model_complexity=1):
+    logger.info(f"Loading MediaPipe pose model (model_complexity={model_complexity})")
+    return mp_pose.Pose(model_complexity=model_complexity,
+                        min_detection_confidence=0.5,
+                        min_tracking_confidence=0.5)
+
+
+class ExerciseTracker:
+    """Rep count, stage and per-rep analytics for the exercise a session is currently counting."""
+
+    def __init__(self, exercise):
+        self.exercise = exercise
+        self.spec = EXERCISES[exercise]
+        self.angle_index = ANGLE_INDEX[self.spec["angle"]]
+        # Landmarks of each side the angle is taken from; confidence is the better-seen side's.
+        self.sides = [list(JOINT_ANGLES[name]) for name in angle_sides(self.spec["angle"])]
+        self.counter = RepCounter(self.spec)
+        self.analyzer = RepAnalyzer(self.spec)
+
+    def update(self, angles, points, timestamp):
+        """Feed one frame of joint angles.
+
+        Returns the overlay values, whether a rep completed, and the rep
+        record this frame closed (or None).
+        """
+        angle = float(angles[self.angle_index])
+        counter = self.counter
+        before = {"angle": angle, "count": counter.count, "stage": counter.stage,
+                  "confidence": float(max(points[joints, 3].mean() for joints in self.sides))}
+        was_flexed = counter.flexed
+        completed = counter.update(angle)
+        record = self.analyzer.update(timestamp, angle, counter.flexed, was_flexed, counter.count)
+        return before, completed, record
+
+
+class Session:
+    """One user's counting session: its own frame source, pipeline, pose graphs, counter and stop event.
+
+    Viewers of the same session share its FrameHub, so extra tabs don't open
+    the camera again. Pose graphs are per session because MediaPipe tracks
+    the person from frame to frame; sharing one graph between cameras would
+    mix their tracking state.
+
+    The source is usually a CameraSource. An ingest session (IngestSource)
+    has no camera: its frames or ready-made landmarks are uploaded by the
+    client through ingest(), so the node needs no attached hardware.
+    Replays (sources.VideoFileSource, SyntheticLandmarkSource) run the same
+    pipeline over recorded input; pass `lossless=True` to count every frame.
+
+    Each run publishes to one hub per feed a viewer has asked for, keyed
+    (kind, profile): ("jpeg", profile) MJPEG parts, ("raw", profile) BGR
+    frames for the H.264 encoder, and ("landmarks", None) JSON lines. A
+    feed is only rendered while it has subscribers.
+
+    With `max_people` > 1 the session counts for a group: one PoseLandmarker
+    call per frame finds everyone, a PersonTracker keeps their IDs stable,
+    and each person has their own smoother, counter and rep analytics.
+    Counts go out as a "people" event and per-person counter events.
+
+    Given an `inference_pool` (inference_pool.PoseWorkerPool), single-person
+    pose inference runs in the session's pool worker instead of on its own
+    inference thread, so sessions spread across cores. With `roi` it runs
+    on a crop around the person while they are tracked.
+
+    With `idle_gating` a MotionGate puts the session to sleep once nobody
+    has been seen for a while: frames are only checked for motion and a
+    couple per second published, until movement wakes it. Transitions go
+    out as "activity" events.
+    """
+
+    def __init__(self, session_id, source, exercise, emitter, target_fps=TARGET_FPS, jpeg_backend="auto",
+                 lossless=False, max_people=1, inference_pool=None, roi=ROI_CROPPING,
+                 idle_gating=IDLE_GATING, claim=None):
+        self.id = session_id
+        self.source = source
+        self.lossless = lossless
+        self.room = f"session-{session_id}"
+        self.emitter = emitter
+        self.tracker = ExerciseTracker(exercise)
+        self.max_people = max_people
+        self.people = PersonTracker(self._new_tracker, max_people) if max_people > 1 else None
+        self.adaptive = AdaptiveController(target_fps, name=self.room)
+        self.smoother = LandmarkSmoother()
+        self.stop_event = threading.Event()
+        self.count_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        # Called with the session before each run opens its source (see SessionRegistry.claim()).
+        self.claim = claim
+        self.starting = False
+        self.last_counts = {name: 0 for name in EXERCISES}
+        # Group sessions: each person's count in the current run, and per exercise as of its last rep.
+        self._person_counts = {}
+        self.last_person_counts = {name: {} for name in EXERCISES}
+        self.jpeg_backend = jpeg_backend
+        self.hub = None
+        self.feeds = {}
+        self._feeds_lock = threading.Lock()
+        self.pipeline = None
+        self._latest = {}
+        self._poses = {}
+        self._multi_pose = None
+        self.inference_pool = inference_pool if max_people == 1 else None
+        self._pose_client = None
+        self.roi = RegionOfInterest() if roi and max_people == 1 else None
+        self.motion = MotionGate() if idle_gating else None
+        self._thread = None
+        self._stream = None
+        self.created = self.last_active = time.monotonic()
+        self.capture_rate = RateMeter()
+        self._frames_captured = FRAMES_CAPTURED.labels(session_id)
+        self._inference_seconds = INFERENCE_SECONDS.labels(session_id)
+        self._decode_seconds = DECODE_SECONDS.labels(session_id)
+        self._frame_latency = FRAME_LATENCY_SECONDS.labels(session_id)
+
+    @property
+    def exercise(self):
+        return self.tracker.exercise
+
+    @property
+    def running(self):
+        return self.pipeline is not None and self.pipeline.running and not self.hub.closed
+
+    @property
+    def viewers(self):
+        return sum(hub.subscribers for hub in list(self.feeds.values()))
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def idle_for(self, now):
+        if self.viewers:
+            return 0.0
+        last = max([self.last_active] + [hub.idle_since for hub in list(self.feeds.values())])
+        return now - last
+
+    def pose(self, model_complexity, cropped=False):
+        # ROI crops get their own graph: MediaPipe tracks in input coordinates,
+        # which change meaning whenever the input switches between crop and frame.
+        pose = self._poses.get((model_complexity, cropped))
+        if pose is None:
+            pose = self._poses[(model_complexity, cropped)] = create_pose(model_complexity)
+        return pose
+
+    def multi_pose(self):
+        """The group pose model, loaded on first use."""
+        if self._multi_pose is None:
+            try:
+                self._multi_pose = MultiPoseEstimator(self.max_people)
+            except (OSError, RuntimeError, ValueError) as e:
+                raise ModelUnavailableError(f"Multi-person tracking is unavailable: {e}")
+        return self._multi_pose
+
+    def _new_tracker(self):
+        return ExerciseTracker(self.exercise)
+
+    def reset(self, exercise):
+        """Start counting `exercise` from zero."""
+        self.tracker = ExerciseTracker(exercise)
+        if self.people is not None:
+            self._reset_people()
+        self.stop_event.clear()
+        self.touch()
+
+    def set_exercise(self, exercise):
+        if exercise != self.exercise:
+            logger.info(f"{self.room}: switching from {self.exercise} to {exercise}")
+            self.tracker = ExerciseTracker(exercise)
+            if self.people is not None:
+                self._reset_people()
+
+    def _reset_people(self):
+        self.people.reset()
+        with self.count_lock:
+            self._person_counts = {}
+
+    @property
+    def ingesting(self):
+        return self.source.kind == "upload"
+
+    @property
+    def camera_index(self):
+        return self.source.index if self.source.kind == "camera" else None
+
+    def start(self):
+        """Open the source and start the pipeline unless already running."""
+        with self._start_lock:
+            if not self.running:
+                self._start()
+
+    def feed(self, kind, profile=None):
+        """This run's hub for one feed, created the first time a viewer asks for it."""
+        with self._feeds_lock:
+            hub = self.feeds.get((kind, profile))
+            if hub is None:
+                hub = self.feeds[(kind, profile)] = FrameHub(name=f"{self.room}-{kind}-{profile or 'all'}")
+                if self.hub is None or self.hub.closed:
+                    hub.close()
+            return hub
+
+    def _start(self):
+        if self.claim is not None:
+            self.claim(self)
+        try:
+            self._open_run()
+        finally:
+            self.starting = False
+
+    def _open_run(self):
+        self.stop_event.clear()
+        if self.people is not None and self.source.kind in ("camera", "file"):
+            # Fail before taking the camera if the group model can't load.
+            self.multi_pose()
+        try:
+            stream = self.source.open(self.stop_event)
+        except OSError as e:
+            raise CaptureError(str(e))
+        logger.info(f"{self.room}: reading {self.source}")
+
+        self.emitter.start()
+        hub = FrameHub(name=self.room)
+        feeds = {("jpeg", DEFAULT_PROFILE): hub}
+        pipeline = FramePipeline(lambda: self._read_frame(stream), self._stages(feeds), name=self.room,
+                                 on_drop=lambda stage: FRAMES_DROPPED.labels(self.id, stage).inc(),
+                                 lossless=self.lossless)
+        with self._feeds_lock:
+            self.hub, self.feeds = hub, feeds
+        self._stream = stream
+        self.pipeline = pipeline.start()
+        # The publisher owns this run's stream and hubs, so a quick restart
+        # can't have an old thread release the new camera.
+        self._thread = threading.Thread(target=self._publish_loop, args=(pipeline, feeds, stream),
+                                        name=f"{self.room}-publish", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        self.touch()
+
+    def wait(self, timeout=None):
+        """Block until the current run has finished, e.g. a replay reaching the end of its source."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def close(self):
+        self.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        for pose in self._poses.values():
+            pose.close()
+        self._poses.clear()
+        if self._multi_pose is not None:
+            self._multi_pose.close()
+            self._multi_pose = None
+        if self._pose_client is not None:
+            self._pose_client.close()
+            self._pose_client = None
+
+    def ingest(self, jpeg=None, landmarks=None, timestamp=None):
+        """Queue one uploaded JPEG or landmark array and return the latest result.
+
+        `timestamp` is the client's capture time in seconds, if it sent one.
+        Processing is asynchronous: the reply describes the newest frame the
+        pipeline has finished so far, which may be a frame or two behind.
+        """
+        if not self.ingesting:
+            raise SessionConflictError(f"Session '{self.id}' reads {self.source}; it does not accept uploads")
+        if self.stop_event.is_set():
+            raise SessionConflictError(f"Session '{self.id}' is stopped; call /start-counting")
+        self.touch()
+        if jpeg is not None and self.people is not None:
+            self.multi_pose()
+        self.start()
+        if jpeg is not None:
+            started = time.perf_counter()
+            self.source.push_jpeg(jpeg, timestamp)
+            self._decode_seconds.observe(time.perf_counter() - started)
+        else:
+            self.source.push_landmarks(landmarks, timestamp)
+        return self.result()
+
+    def result(self):
+        """Count, stage, angle and smoothed landmarks after the newest processed frame."""
+        return self._result(self._latest)
+
+    def _result(self, data):
+        if self.people is not None:
+            return {"session": self.id, "exercise": self.exercise, "seq": data.get("seq"),
+                    "people": [{"id": person["id"], "count": person["count"], "stage": person["stage"],
+                                "angle": person["angle"], "landmarks": person["points"].round(4).tolist()}
+                               for person in data.get("people", ())]}
+        counter = self.tracker.counter
+        points = data.get("points")
+        return {"session": self.id, "exercise": self.exercise, "seq": data.get("seq"),
+                "count": counter.count, "stage": counter.stage, "angle": data.get("angle"),
+                "landmarks": points.round(4).tolist() if points is not None else None}
+
+    def reps(self):
+        """Recent per-rep records for the current exercise, oldest first, with averages."""
+        if self.people is not None:
+            return {"session": self.id, "exercise": self.exercise,
+                    "people": [{"id": person.id, "reps": list(person.tracker.analyzer.records),
+                                "summary": person.tracker.analyzer.summary()}
+                               for person in list(self.people.people)]}
+        analyzer = self.tracker.analyzer
+        return {"session": self.id, "exercise": self.exercise, "reps": list(analyzer.records),
+                "summary": analyzer.summary()}
+
+    def last_count(self, exercise):
+        """Reps counted for `exercise` as of its last rep; in a group session, everyone's reps added up."""
+        with self.count_lock:
+            return self.last_counts[exercise]
+
+    def last_person_count(self, exercise):
+        """A group session's per-person counts for `exercise` as of its last rep, keyed by person ID."""
+        with self.count_lock:
+            return dict(self.last_person_counts[exercise])
+
+    def stats(self):
+        stats = self.pipeline.stats() if self.pipeline is not None else {}
+        stats = dict(stats, session=self.id, camera=self.camera_index, source=str(self.source), exercise=self.exercise,
+                     running=self.running, viewers=self.viewers,
+                     adaptive=self.adaptive.snapshot(), filled_frames=self.smoother.filled,
+                     feeds={f"{kind}:{profile}" if profile else kind: hub.subscribers
+                            for (kind, profile), hub in list(self.feeds.items())})
+        if self.ingesting:
+            stats["ingest"] = self.source.stats()
+        if self.source.kind == "camera" and self._stream is not None:
+            stats["capture"] = self._stream.stats()
+        if self.people is not None:
+            stats["people"] = len(self.people.people)
+        if self.roi is not None:
+            stats["roi"] = self.roi.stats()
+        if self.motion is not None:
+            stats["motion"] = self.motion.stats()
+        return stats
+
+    def _read_frame(self, stream):
+        frame = stream.read()
+        if frame is not None:
+            self._frames_captured.inc()
+            self.capture_rate.tick(time.perf_counter())
+        return frame
+
+    def _publish_loop(self, pipeline, feeds, stream):
+        try:
+            for packet in pipeline.packets():
+                for key, payload in packet.outputs.items():
+                    feeds[key].publish(payload)
+                self._frame_latency.observe(packet.latency)
+        except Exception as e:
+            logger.error(f"Error in {self.room} publisher: {e}")
+        finally:
+            pipeline.stop()
+            with self._feeds_lock:
+                for hub in feeds.values():
+                    hub.close()
+            logger.info(f"{self.room} pipeline finished: {pipeline.stats()}")
+            stream.close()
+
+    def _count(self, tracker, packet, points):
+        values, completed, record = tracker.update(packet.data["angles"], points, packet.timestamp)
+        packet.data.update(values)
+        counter = tracker.counter
+        room = None if self.id == DEFAULT_SESSION else self.room
+        if completed:
+            logger.info(f"{self.room}: {tracker.spec['label']} rep completed. Count: {counter.count}")
+            REPS_COUNTED.labels(tracker.exercise).inc()
+            with self.count_lock:
+                self.last_counts[tracker.exercise] = counter.count
+            # Queued for the emitter thread; no network I/O on the frame thread.
+            self.emitter.event(tracker.spec["event"], {'exercise': tracker.exercise, 'count': counter.count,
+                                                       'stage': counter.stage, 'session': self.id}, room=room)
+        if record is not None:
+            # Every rep record is sent; two finishing in one tick must not merge.
+            self.emitter.queue_event("rep", dict(record, exercise=tracker.exercise, session=self.id), room=room)
+        self.emitter.push(self.room, packet.timings["capture"], values["angle"], counter.stage,
+                          counter.count, values["confidence"], tracker.exercise)
+
+    def _set_idle(self, idle):
+        logger.info(f"{self.room}: {'nobody in view, going idle' if idle else 'motion detected, resuming'}")
+        room = None if self.id == DEFAULT_SESSION else self.room
+        self.emitter.event("activity", {"session": self.id, "exercise": self.exercise,
+                                        "state": "idle" if idle else "active"}, room=room)
+
+    def _count_people(self, packet, detections):
+        people = self.people.update(detections, packet.timestamp)
+        room = None if self.id == DEFAULT_SESSION else self.room
+        results = []
+        if people:
+            # One vectorized pass over everyone's landmarks.
+            points = np.stack([person.points for person in people])
+            angles = joint_angles(points)
+            for person, person_points, person_angles in zip(people, points, angles):
+                tracker = person.tracker
+                values, completed, record = tracker.update(person_angles, person_points, packet.timestamp)
+                counter = tracker.counter
+                if completed:
+                    logger.info(f"{self.room}: person {person.id} {tracker.spec['label']} rep completed. "
+                                f"Count: {counter.count}")
+                    REPS_COUNTED.labels(tracker.exercise).inc()
+                    with self.count_lock:
+                        self._person_counts[person.id] = counter.count
+                        self.last_person_counts[tracker.exercise] = dict(self._person_counts)
+                        self.last_counts[tracker.exercise] = sum(self._person_counts.values())
+                    self.emitter.event(tracker.spec["event"], {'exercise': tracker.exercise, 'count': counter.count,
+                                                               'stage': counter.stage, 'session': self.id,
+                                                               'person': person.id}, room=room, key=person.id)
+                if record is not None:
+                    self.emitter.queue_event("rep", dict(record, exercise=tracker.exercise, session=self.id,
+                                                         person=person.id), room=room)
+                results.append({"id": person.id, "count": counter.count, "stage": counter.stage,
+                                "angle": values["angle"], "confidence": values["confidence"],
+                                "points": person_points})
+        packet.data["people"] = results
+        self.emitter.event("people", {"session": self.id, "exercise": self.exercise,
+                                      "people": [{"id": person["id"], "count": person["count"],
+                                                  "stage": person["stage"]} for person in results]}, room=room)
+
+    def _stages(self, feeds):
+        adaptive = self.adaptive
+        client = None
+        if self.inference_pool is not None:
+            if self._pose_client is None:
+                self._pose_client = self.inference_pool.attach(self.id)
+            client = self._pose_client
+        elif self.people is None:
+            self.pose(adaptive.model_complexity)
+        last = {"results": None, "data": {}}
+        smoother = self.smoother
+        raw_points = np.empty((33, 4), dtype=np.float32)
+        # Scratch images owned by the inference thread, reused for every frame.
+        scaled = BufferRing(size=1)
+        rgb = BufferRing(size=1)
+        roi = self.roi
+        roi_input = BufferRing(size=1)
+        motion = self.motion
+        rescalers = {name: Rescaler(profile["width"]) for name, profile in PROFILES.items()}
+        jpeg_encoders = {name: create_jpeg_encoder(self.jpeg_backend, profile["quality"])
+                         for name, profile in PROFILES.items()}
+        encode_metrics = {name: (ENCODE_SECONDS.labels(self.id, name), ENCODE_BYTES.labels(self.id, name))
+                          for name in PROFILES}
+
+        def watched():
+            return [(key, hub) for key, hub in list(feeds.items()) if hub.subscribers]
+
+        def infer(packet):
+            tracker = self.tracker
+            packet.data["label"] = tracker.spec["label"]
+            packet.data["seq"] = packet.seq
+            if isinstance(packet.frame, Landmarks):
+                # Landmarks from a client or a replay: no pose to run and no
+                # image to draw on; only the landmarks feed has anything to show.
+                if self.people is not None:
+                    points = packet.frame.points
+                    self._count_people(packet, [] if points is None else points.reshape(-1, 33, 4))
+                    self._latest = packet.data
+                    return packet
+                points = smoother.update(packet.frame.points, packet.timestamp)
+                if points is not None:
+                    packet.data["points"] = points.copy()
+                    packet.data["angles"] = joint_angles(points)
+                    self._count(tracker, packet, points)
+                self._latest = packet.data
+                return packet
+
+            if motion is not None and motion.idle:
+                if not motion.moved(packet.frame):
+                    # Nobody around: no inference, and only the odd frame goes on to be drawn and encoded.
+                    if not motion.due(packet.timestamp):
+                        return None
+                    packet.results = last["results"]
+                    packet.data.update(last["data"])
+                    return packet
+                self._set_idle(False)
+            elif last["results"] is not None and not adaptive.should_infer():
+                # Under load: show the previous landmarks and leave the counter
+                # alone, so a skipped frame is never counted as a second sample.
+                packet.results = last["results"]
+                packet.data.update(last["data"])
+                return packet
+
+            # Shrink before converting so the colour conversion touches fewer pixels.
+            image = packet.frame
+            scale = adaptive.scale
+            cropped = None
+            if roi is not None:
+                size = roi.input_size
+                cropped = roi.crop(image, dst=roi_input.next((size, size, 3)))
+            if cropped is not None:
+                # Already small and at a fixed size; the adaptive scale doesn't apply.
+                image = cropped
+            elif scale != 1.0:
+                height, width = image.shape[:2]
+                size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                image = cv2.resize(image, size, dst=scaled.next((size[1], size[0], 3)),
+                                   interpolation=cv2.INTER_AREA)
+            # A pooled session converts straight into its shared-memory slot for the worker to read.
+            dst = client.buffer(image.shape) if client is not None else rgb.next(image.shape)
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=dst)
+            image.flags.writeable = False
+            started = time.perf_counter()
+            try:
+                if self.people is not None:
+                    # Everyone in the frame from one model call.
+                    detections = self.multi_pose().process(image, packet.timestamp)
+                elif client is not None:
+                    packet.results = client.process(image, adaptive.model_complexity, cropped is not None)
+                else:
+                    packet.results = self.pose(adaptive.model_complexity, cropped is not None).process(image)
+            finally:
+                image.flags.writeable = True
+            elapsed = time.perf_counter() - started
+            adaptive.record(elapsed)
+            self._inference_seconds.observe(elapsed)
+
+            if self.people is not None:
+                self._count_people(packet, detections)
+                if motion is not None and motion.observe(bool(detections)):
+                    self._set_idle(True)
+                packet.results = packet.data["people"]
+                last["results"] = packet.results
+                last["data"] = packet.data
+                self._latest = packet.data
+                return packet
+
+            # Counting stays on the inference thread so every inferred frame is
+            # seen, even when the overlay or encode stages drop some of them.
+            # The smoother filters jitter and bridges short detection dropouts.
+            points = None
+            if client is not None:
+                points = packet.results.points
+            elif packet.results.pose_landmarks:
+                points = landmarks_to_array(packet.results.pose_landmarks.landmark, out=raw_points)
+            if roi is not None:
+                if cropped is not None and points is not None:
+                    # Back to full-frame coordinates, which is also what the overlay draws.
+                    packet.results = LandmarkResult(roi.to_frame(points).copy())
+                roi.update(points, packet.frame.shape)
+            if motion is not None and motion.observe(points is not None):
+                self._set_idle(True)
+            points = smoother.update(points, packet.timestamp)
+            if points is not None:
+                packet.data["points"] = points.copy()
+                packet.data["angles"] = joint_angles(points)
+                self._count(tracker, packet, points)
+            last["results"] = packet.results
+            last["data"] = packet.data
+            self._latest = packet.data
+            return packet
+
+        def overlay(packet):
+            if isinstance(packet.frame, Landmarks) or not any(kind != "landmarks" for (kind, _), _ in watched()):
+                return packet
+            # Draw straight onto the captured BGR frame instead of converting back from RGB.
+            image = packet.frame
+            if self.people is not None:
+                draw_people(image, packet.data.get("people", ()))
+                return packet
+            if packet.results.pose_landmarks:
+                mp_drawing.draw_landmarks(
+                    image,
+                    packet.results.pose_landmarks,
+                    mp_pose.POSE_CONNECTIONS,
+                    mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
+                    mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
+                )
+            if "angle" in packet.data:
+                cv2.putText(image, f"Angle: {packet.data['angle']:.2f}",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+                cv2.putText(image, f"{packet.data['label']}: {packet.data['count']}",
+                            (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+                cv2.putText(image, f"Stage: {packet.data['stage']}",
+                            (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+            return packet
+
+        def encode(packet):
+            # Render each watched feed once; every viewer of it then sends the same object.
+            for (kind, profile), hub in watched():
+                if kind == "landmarks":
+                    line = json.dumps(self._result(packet.data), separators=(",", ":"))
+                    packet.outputs[(kind, profile)] = line.encode() + b"\n"
+                    continue
+                if isinstance(packet.frame, Landmarks):
+                    continue
+                image = rescalers[profile](packet.frame)
+                if kind == "raw":
+                    # The H.264 feeder reads this later, after the scratch buffer is reused.
+                    packet.outputs[(kind, profile)] = image.copy()
+                    continue
+                started = time.perf_counter()
+                jpeg = jpeg_encoders[profile].encode(image)
+                if jpeg is None:
+                    logger.error(f"{self.room}: failed to encode {profile} frame")
+                    continue
+                packet.outputs[(kind, profile)] = mjpeg_part(jpeg)
+                encode_seconds, encode_bytes = encode_metrics[profile]
+                encode_seconds.observe(time.perf_counter() - started)
+                encode_bytes.observe(memoryview(jpeg).nbytes)
+            return packet
+
+        return [("inference", infer), ("overlay", overlay), ("encode", encode)]
+
+
+class SessionRegistry:
+    """Sessions keyed by ID, with a concurrency cap and idle eviction.
+
+    A session is idle while nobody is watching its feed and no API call has
+    touched it; after `idle_timeout` seconds it is stopped, its camera
+    released and its entry dropped. When the registry is full, stopped
+    sessions are evicted (oldest first) to make room before a new session is
+    refused with SessionLimitError.
+    """
+
+    def __init__(self, emitter, max_sessions=4, idle_timeout=120.0, reap_interval=5.0, target_fps=TARGET_FPS,
+                 jpeg_backend="auto", inference_pool=None):
+        self.emitter = emitter
+        self.inference_pool = inference_pool
+        self.jpeg_backend = jpeg_backend
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self.target_fps = target_fps
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._reaping = False
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def all(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    def get_or_create(self, session_id, exercise, camera_index=0, ingest=False, source=None, max_people=1):
+        """The session `session_id`, created on `source` if new (default: an
+        upload source with `ingest`, else camera `camera_index`), counting
+        for up to `max_people` people."""
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise SessionError(f"Invalid session id '{session_id}'")
+        evicted = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touch()
+                return session
+
+            if source is None:
+                source = IngestSource(max_people=max_people) if ingest else CameraSource(camera_index)
+            if source.kind == "camera":
+                self._check_camera(source.index)
+
+            if len(self._sessions) >= self.max_sessions:
+                for stale in sorted((s for s in self._sessions.values() if not s.running),
+                                    key=lambda s: s.last_active):
+                    evicted.append(self._sessions.pop(stale.id))
+                    if len(self._sessions) < self.max_sessions:
+                        break
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"Session limit of {self.max_sessions} reached")
+
+            session = Session(session_id, source, exercise, self.emitter, target_fps=self.target_fps,
+                              jpeg_backend=self.jpeg_backend, max_people=max_people,
+                              inference_pool=self.inference_pool, claim=self.claim)
+            self._sessions[session_id] = session
+            logger.info(f"Created session '{session_id}' on {source} ({len(self._sessions)} active)")
+
+        for stale in evicted:
+            self._close(stale, "evicted to make room")
+        return session
+
+    def _check_camera(self, index, session=None):
+        # Called with self._lock held.
+        for other in self._sessions.values():
+            if other is not session and other.camera_index == index and (other.running or other.starting):
+                raise SessionConflictError(f"Camera {index} is in use by session '{other.id}'")
+
+    def claim(self, session):
+        """Reserve `session`'s camera for the run it is starting, or raise SessionConflictError.
+
+        Sessions are only checked against each other when they are created,
+        so two created before either started could otherwise both open the
+        same device; this check runs again as each run starts.
+        """
+        if session.source.kind != "camera":
+            return
+        with self._lock:
+            self._check_camera(session.camera_index, session)
+            session.starting = True
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._close(session, "removed")
+        return session
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [s for s in self._sessions.values() if s.idle_for(now) > self.idle_timeout]
+            for session in idle:
+                del self._sessions[session.id]
+        for session in idle:
+            self._close(session, f"idle for more than {self.idle_timeout:.0f}s")
+        return idle
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close(session, "shutting down")
+
+    def start_reaper(self, start_background_task, sleep):
+        """Run evict_idle() every `reap_interval` seconds on the server's background-task runner."""
+        if self._reaping:
+            return
+        self._reaping = True
+
+        def reap():
+            while self._reaping:
+                sleep(self.reap_interval)
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    logger.error(f"Error evicting idle sessions: {e}")
+
+        start_background_task(reap)
+
+    def stop_reaper(self):
+        self._reaping = False
+
+    def _close(self, session, reason):
+        logger.info(f"Closing session '{session.id}': {reason}")
+        session.close()
+        for metric in (metrics.FRAMES_CAPTURED, metrics.CAPTURE_FPS, metrics.FRAMES_DROPPED,
+                       metrics.INFERENCE_SECONDS, metrics.DECODE_SECONDS, metrics.ENCODE_SECONDS, metrics.ENCODE_BYTES,
+                       metrics.FRAME_LATENCY_SECONDS, metrics.VIDEO_FEED_CLIENTS, metrics.ADAPTIVE_LEVEL,
+                       metrics.SESSION_IDLE):
+            metric.remove_matching(session=session.id)
@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al., 2012) applied element-wise to a numpy array.
+
+    Low speeds get heavy smoothing (cutoff `min_cutoff` Hz) to kill jitter;
+    fast movements raise the cutoff by `beta` per unit/second of speed so
+    real motion is not lagged. All state lives in preallocated arrays, so a
+    call does no per-frame allocation beyond numpy scalars. Timestamps are in
+    seconds and may be irregular.
+    """
+
+    def __init__(self, shape, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, dtype=np.float32):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = np.zeros(shape, dtype=dtype)
+        self.velocity = np.zeros(shape, dtype=dtype)
+        self._raw_velocity = np.zeros(shape, dtype=dtype)
+        self._alpha = np.zeros(shape, dtype=dtype)
+        self.timestamp = None
+
+    def reset(self):
+        self.velocity.fill(0)
+        self.timestamp = None
+
+    def __call__(self, x, timestamp):
+        if self.timestamp is None:
+            np.copyto(self.value, x)
+            self.velocity.fill(0)
+            self.timestamp = timestamp
+            return self.value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        self.timestamp = timestamp
+
+        # Smoothed derivative, then a speed-dependent cutoff for the value itself.
+        np.subtract(x, self.value, out=self._raw_velocity)
+        self._raw_velocity /= dt
+        a_d = _alpha(self.d_cutoff, dt)
+        self.velocity *= 1 - a_d
+        self._raw_velocity *= a_d
+        self.velocity += self._raw_velocity
+
+        np.abs(self.velocity, out=self._alpha)
+        self._alpha *= self.beta
+        self._alpha += self.min_cutoff
+        # alpha = 1 / (1 + 1 / (2*pi*cutoff*dt))
+        self._alpha *= 2 * math.pi * dt
+        np.reciprocal(self._alpha, out=self._alpha)
+        self._alpha += 1
+        np.reciprocal(self._alpha, out=self._alpha)
+
+        # value += alpha * (x - value)
+        np.subtract(x, self.value, out=self._raw_velocity)
+        self._raw_velocity *= self._alpha
+        self.value += self._raw_velocity
+        return self.value
+
+    def extrapolate(self, timestamp):
+        """Carry the value forward along the filtered velocity to `timestamp`, with no new sample."""
+        dt = timestamp - self.timestamp
+        if dt > 0:
+            np.multiply(self.velocity, dt, out=self._raw_velocity)
+            self.value += self._raw_velocity
+            self.timestamp = timestamp
+        return self.value
+
+
+class LandmarkSmoother:
+    """Temporal filter between pose inference and rep counting.
+
+    update() takes the (33, 4) x/y/z/visibility array for one frame, or None
+    when MediaPipe found nobody, and returns the filtered array. Coordinates
+    go through a OneEuroFilter; visibility passes through. A dropout of up to
+    `max_gap` frames is bridged by extrapolating the filtered velocity, with
+    visibility decayed so downstream code can tell; longer gaps return None
+    and reset the filter.
+    """
+
+    def __init__(self, min_cutoff=2.5, beta=8.0, d_cutoff=1.0, max_gap=5, gap_visibility_decay=0.8):
+        self.filter = OneEuroFilter((33, 3), min_cutoff=min_cutoff, beta=beta, d_cutoff=d_cutoff)
+        self.max_gap = max_gap
+        self.gap_visibility_decay = gap_visibility_decay
+        self.output = np.zeros((33, 4), dtype=np.float32)
+        self.gap = 0
+        self.filled = 0
+
+    @property
+    def active(self):
+        return self.filter.timestamp is not None
+
+    def reset(self):
+        self.filter.reset()
+        self.gap = 0
+
+    def update(self, points, timestamp):
+        if points is not None:
+            self.gap = 0
+            self.output[:, :3] = self.filter(points[:, :3], timestamp)
+            self.output[:, 3] = points[:, 3]
+            return self.output
+
+        if not self.active or self.gap >= self.max_gap:
+            self.reset()
+            return None
+
+        self.gap += 1
+        self.filled += 1
+        self.output[:, :3] = self.filter.extrapolate(timestamp)
+        self.output[:, 3] *= self.gap_visibility_decay
+        return self.output
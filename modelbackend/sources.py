@@ -0,0 +1,413 @@
+import math
+import threading
+import time
+import logging
+
+import cv2
+import numpy as np
+
+from kinematics import JOINT_ANGLES, angle_sides
+from pipeline import BufferRing, FramePacket
+
+logger = logging.getLogger(__name__)
+
+# What cameras are asked for. MJPG lets USB webcams deliver 720p and above at
+# full frame rate; a buffer of one frame keeps the driver from queueing stale
+# ones. Drivers may pick the nearest mode they support.
+CAMERA_WIDTH = 1280
+CAMERA_HEIGHT = 720
+CAMERA_FOURCC = "MJPG"
+CAMERA_BUFFER_SIZE = 1
+# Seconds between attempts to reopen a camera that stopped delivering, doubling up to the maximum.
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 5.0
+
+# A frame source has a `kind` and an open(stop_event) that starts one run and
+# returns a stream. stream.read() gives the next BGR frame, Landmarks, or
+# FramePacket (to carry its own timestamp), or None at the end or once
+# `stop_event` is set; stream.close() releases what open() acquired. Sessions
+# open their source again on every restart, so a stream is never shared
+# between runs.
+
+
+class Landmarks:
+    """A (33, 4) x/y/z/visibility array standing in for an image; the pipeline skips pose inference for these.
+
+    `points` is None for a frame in which nobody was detected.
+    """
+
+    __slots__ = ("points",)
+
+    def __init__(self, points):
+        self.points = points
+
+
+def synthetic_landmarks(spec, reps, fps=30.0, rep_seconds=2.0, jitter=0.006, glitch=0.02,
+                        dropout=0.05, seed=0, side="left"):
+    """(T, 33, 4) landmark stream whose counted angle sweeps through `reps` reps.
+
+    Frames lost to dropout are NaN. Glitch frames move the joint vertex by a
+    large random offset for a single frame, as a mis-detection would. For a
+    bilateral angle, `side` ("left" or "right") is the side facing the
+    camera; the other side's landmarks are scattered with low visibility.
+    """
+    rng = np.random.default_rng(seed)
+    sides = angle_sides(spec["angle"])
+    name = sides[0] if len(sides) == 1 else sides[side == "right"]
+    a, b, c = JOINT_ANGLES[name]
+    frames_per_rep = int(rep_seconds * fps)
+    low = math.radians(spec["flex_below"] - 15)
+    high = math.radians(min(spec["extend_above"] + 10, 179))
+    phase = np.linspace(0, 2 * np.pi, frames_per_rep, endpoint=False)
+    sweep = (high + low) / 2 + (high - low) / 2 * np.cos(phase)
+    if spec["start_stage"] == spec["flexed_stage"]:
+        sweep = (high + low) - sweep
+    theta = np.concatenate([np.tile(sweep, reps), np.full(frames_per_rep // 2, sweep[0])])
+
+    frames = len(theta)
+    points = np.zeros((frames, 33, 4), dtype=np.float32)
+    points[:, :, :2] = rng.uniform(0.2, 0.8, (33, 2))
+    points[:, :, 3] = 0.9
+    for other in sides:
+        if other != name:
+            points[:, list(JOINT_ANGLES[other]), 3] = 0.2
+    radius = 0.15
+    points[:, b, :2] = (0.5, 0.5)
+    points[:, c, 0] = 0.5
+    points[:, c, 1] = 0.5 - radius
+    points[:, a, 0] = 0.5 + radius * np.sin(theta)
+    points[:, a, 1] = 0.5 - radius * np.cos(theta)
+
+    points[:, :, :2] += rng.normal(0.0, jitter, (frames, 33, 2))
+    glitched = rng.random(frames) < glitch
+    points[glitched, b, :2] += rng.uniform(-0.12, 0.12, (int(glitched.sum()), 2))
+    points[rng.random(frames) < dropout] = np.nan
+    return points
+
+
+def synthetic_group(spec, reps, fps=30.0, seed=0, **options):
+    """(T, N, 33, 4) stream of N people side by side, person i doing `reps[i]` reps.
+
+    Each person is a synthetic_landmarks() stream scaled down (which keeps
+    its angles) into its own vertical strip of the frame, alternating the
+    side facing the camera. Shorter streams are padded with NaN (the person
+    has left).
+    """
+    people = [synthetic_landmarks(spec, count, fps=fps, seed=seed + i, side=("left", "right")[i % 2], **options)
+              for i, count in enumerate(reps)]
+    frames = max(len(points) for points in people)
+    group = np.full((frames, len(people), 33, 4), np.nan, dtype=np.float32)
+    for i, points in enumerate(people):
+        points[..., :2] /= len(people)
+        points[..., 0] += i / len(people)
+        points[..., 1] += (1 - 1 / len(people)) / 2
+        group[:len(points), i] = points
+    return group
+
+
+class CaptureStream:
+    """One opened run of a VideoCapture, reading into a ring of reused buffers.
+
+    With `fps` set, reads are paced to that rate (a file replayed as if it
+    were live); otherwise frames come as fast as they decode. File streams
+    stamp packets with the media time so smoothing doesn't depend on the
+    replay speed.
+    """
+
+    def __init__(self, cap, name, stop_event, fps=None, media_time=False, loop=False):
+        self.cap = cap
+        self.name = name
+        self.stop_event = stop_event
+        self.interval = 1.0 / fps if fps else 0.0
+        self.media_time = media_time
+        self.loop = loop
+        self.frames = BufferRing()
+        self._next_frame = None
+
+    def read(self):
+        if self.stop_event.is_set() or not self.cap.isOpened():
+            return None
+        if self.interval:
+            now = time.perf_counter()
+            if self._next_frame is not None and self._next_frame > now:
+                time.sleep(self._next_frame - now)
+            self._next_frame = max(now, self._next_frame or now) + self.interval
+        # Read into the ring's next buffer; OpenCV allocates only when the size changes.
+        ret, frame = self.cap.read(self.frames.next())
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(self.frames.next())
+        if not ret:
+            if self.media_time:
+                logger.info(f"{self.name}: end of file")
+            else:
+                logger.error(f"{self.name}: failed to read frame")
+            return None
+        self.frames.shape = frame.shape
+        if self.media_time:
+            return FramePacket(0, frame, timestamp=self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+        return frame
+
+    def close(self):
+        if self.cap.isOpened():
+            logger.info(f"{self.name}: releasing capture")
+            self.cap.release()
+
+
+class CameraStream:
+    """A live camera drained on its own thread, so reads always get the newest frame.
+
+    The grabber thread calls cap.grab() as fast as the camera delivers and
+    notes the (monotonic) time of each frame; read() decodes only the latest
+    grabbed frame, so frames the pipeline is too slow for are skipped
+    without ever being decoded, and nothing queues up behind a slow stage.
+    The two take turns on the capture, which isn't thread-safe.
+    Packets carry the grab time as both their timestamp and capture time.
+
+    When the camera stops delivering (unplugged, or taken by the driver),
+    the grabber releases it and calls `reopen` until it comes back instead
+    of ending the run; read() waits meanwhile.
+    """
+
+    def __init__(self, cap, reopen, name, stop_event):
+        self.cap = cap
+        self.reopen = reopen
+        self.name = name
+        self.stop_event = stop_event
+        self.frames = BufferRing()
+        self._lock = threading.Condition()
+        self._grabbed = 0
+        self._read = 0
+        self._grabbed_at = None
+        self._grabbing = False
+        self._reading = False
+        self._waiting = 0
+        self._closed = False
+        self.reconnects = 0
+        self.decoded = 0
+        self._thread = threading.Thread(target=self._grab_loop, name=f"{name}-grab", daemon=True)
+        self._thread.start()
+
+    @property
+    def stopped(self):
+        return self._closed or self.stop_event.is_set()
+
+    def _may_grab(self):
+        # grab() and retrieve() must never overlap on one VideoCapture, and a
+        # reader waiting for the frame just grabbed decodes it before the
+        # next grab replaces it.
+        return self.stopped or not (self._reading or (self._waiting and self._grabbed != self._read))
+
+    def _grab_loop(self):
+        delay = RECONNECT_DELAY
+        while not self.stopped:
+            with self._lock:
+                while not self._may_grab():
+                    self._lock.wait(0.1)
+                if self.stopped:
+                    break
+                cap = self.cap
+                self._grabbing = cap is not None
+            # Outside the lock: grab() blocks until the camera delivers.
+            if cap is not None and cap.grab():
+                with self._lock:
+                    self._grabbing = False
+                    self._grabbed += 1
+                    self._grabbed_at = time.perf_counter()
+                    self._lock.notify_all()
+                delay = RECONNECT_DELAY
+                continue
+
+            with self._lock:
+                self._grabbing = False
+                if self.cap is not None:
+                    logger.error(f"{self.name}: failed to read frame; reconnecting")
+                    self.cap.release()
+                    self.cap = None
+                self._lock.notify_all()
+            # stop_event.wait() doubles as an interruptible sleep.
+            if self.stop_event.wait(delay) or self._closed:
+                break
+            try:
+                cap = self.reopen()
+            except OSError as e:
+                logger.warning(f"{self.name}: {e}; retrying in {min(delay * 2, MAX_RECONNECT_DELAY):.1f}s")
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+            with self._lock:
+                if self._closed:
+                    cap.release()
+                    break
+                self.cap = cap
+                self.reconnects += 1
+            logger.info(f"{self.name}: reconnected")
+        with self._lock:
+            self._lock.notify_all()
+
+    def _may_read(self):
+        return self._grabbed != self._read and self.cap is not None and not self._grabbing
+
+    def read(self):
+        while True:
+            with self._lock:
+                self._waiting += 1
+                try:
+                    while not self._may_read():
+                        if self.stopped:
+                            return None
+                        self._lock.wait(0.1)
+                finally:
+                    self._waiting -= 1
+                if self.stopped:
+                    return None
+                self._read = self._grabbed
+                timestamp = self._grabbed_at
+                cap = self.cap
+                self._reading = True
+            try:
+                # The grabber waits while _reading is set, so the decode has the capture to itself.
+                ret, frame = cap.retrieve(self.frames.next())
+            finally:
+                with self._lock:
+                    self._reading = False
+                    self._lock.notify_all()
+            if ret:
+                break
+            logger.error(f"{self.name}: failed to decode frame")
+        self.decoded += 1
+        self.frames.shape = frame.shape
+        packet = FramePacket(0, frame, timestamp=timestamp)
+        packet.timings["capture"] = timestamp
+        return packet
+
+    def stats(self):
+        with self._lock:
+            return {"grabbed": self._grabbed, "decoded": self.decoded, "skipped": self._grabbed - self.decoded,
+                    "reconnects": self.reconnects, "connected": self.cap is not None}
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        with self._lock:
+            self._lock.wait_for(lambda: not self._reading, timeout=2.0)
+            if self.cap is not None:
+                logger.info(f"{self.name}: releasing capture")
+                self.cap.release()
+                self.cap = None
+
+
+class CameraSource:
+    """A local webcam, read by a CameraStream at the configured size and format."""
+
+    kind = "camera"
+
+    def __init__(self, index=0, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fourcc=CAMERA_FOURCC,
+                 buffer_size=CAMERA_BUFFER_SIZE):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+
+    def __str__(self):
+        return f"camera {self.index}"
+
+    def _capture(self):
+        cap = cv2.VideoCapture(self.index)
+        if not cap.isOpened():
+            cap.release()
+            raise OSError(f"Failed to open camera {self.index}")
+        # FOURCC first: some drivers only offer the larger sizes once it is set.
+        if self.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.width and self.height:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.buffer_size:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC)).to_bytes(4, "little").decode("ascii", "replace")
+        logger.info(f"Webcam {self.index} opened: {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+                    f"{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} {fourcc} at {cap.get(cv2.CAP_PROP_FPS):.0f} fps")
+        return cap
+
+    def open(self, stop_event):
+        return CameraStream(self._capture(), self._capture, str(self), stop_event)
+
+
+class VideoFileSource:
+    """A recorded clip, replayed as fast as it decodes or, with `realtime`, at its own frame rate."""
+
+    kind = "file"
+
+    def __init__(self, path, realtime=False, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+
+    def __str__(self):
+        return f"file {self.path}"
+
+    def open(self, stop_event):
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            cap.release()
+            raise OSError(f"Failed to open video {self.path}")
+        fps = (cap.get(cv2.CAP_PROP_FPS) or 30.0) if self.realtime else None
+        return CaptureStream(cap, str(self), stop_event, fps=fps, media_time=True, loop=self.loop)
+
+
+class SyntheticLandmarkStream:
+    def __init__(self, points, fps, stop_event, realtime):
+        self.points = points
+        self.fps = fps
+        self.stop_event = stop_event
+        self.realtime = realtime
+        self.index = 0
+        self._started = None
+
+    def read(self):
+        if self.stop_event.is_set() or self.index >= len(self.points):
+            return None
+        if self.realtime:
+            if self._started is None:
+                self._started = time.perf_counter()
+            delay = self._started + self.index / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        frame = self.points[self.index]
+        timestamp = self.index / self.fps
+        self.index += 1
+        if frame.ndim == 3:
+            # A group frame: everyone detected in it, possibly nobody.
+            return FramePacket(0, Landmarks(frame[~np.isnan(frame[:, 0, 0])]), timestamp=timestamp)
+        return FramePacket(0, Landmarks(None if np.isnan(frame[0, 0]) else frame), timestamp=timestamp)
+
+    def close(self):
+        pass
+
+
+class SyntheticLandmarkSource:
+    """A generated landmark stream with a known rep count (see synthetic_landmarks()).
+
+    A list of rep counts generates a group, one person per count (see synthetic_group()).
+    """
+
+    kind = "synthetic"
+
+    def __init__(self, spec, reps, fps=30.0, realtime=False, **options):
+        self.fps = fps
+        self.realtime = realtime
+        self.reps = reps
+        if isinstance(reps, (list, tuple)):
+            self.points = synthetic_group(spec, reps, fps=fps, **options)
+        else:
+            self.points = synthetic_landmarks(spec, reps, fps=fps, **options)
+
+    def __str__(self):
+        return f"synthetic ({self.reps} reps at {self.fps:g} fps)"
+
+    def open(self, stop_event):
+        return SyntheticLandmarkStream(self.points, self.fps, stop_event, self.realtime)
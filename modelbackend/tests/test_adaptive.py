@@ -0,0 +1,67 @@
+from adaptive import LEVELS, AdaptiveController
+
+
+def controller(**kwargs):
+    return AdaptiveController(target_fps=10.0, patience=3, recovery=5, **kwargs)
+
+
+def feed(adaptive, latency, times):
+    for _ in range(times):
+        adaptive.record(latency)
+
+
+def test_downgrades_after_patience_samples_over_budget():
+    adaptive = controller()
+    feed(adaptive, 0.2, 2)
+    assert adaptive.level == 0
+    feed(adaptive, 0.2, 1)
+    assert adaptive.level == 1
+    assert adaptive.downgrades == 1
+    assert (adaptive.scale, adaptive.infer_every, adaptive.model_complexity) == LEVELS[1]
+
+
+def test_stops_at_the_cheapest_level():
+    adaptive = controller()
+    feed(adaptive, 1.0, 100)
+    assert adaptive.level == len(LEVELS) - 1
+
+
+def test_budget_grows_with_frame_skipping():
+    adaptive = controller(levels=((1.0, 1, 1), (0.5, 3, 0)))
+    feed(adaptive, 0.2, 3)
+    assert adaptive.level == 1
+    # 0.2 s fits the 0.3 s budget when every third frame is inferred, but not the headroom.
+    feed(adaptive, 0.2, 50)
+    assert adaptive.level == 1
+
+
+def test_recovers_after_sustained_headroom():
+    adaptive = controller()
+    feed(adaptive, 0.2, 3)
+    assert adaptive.level == 1
+    feed(adaptive, 0.01, 4)
+    assert adaptive.level == 1
+    feed(adaptive, 0.01, 1)
+    assert adaptive.level == 0
+    assert adaptive.upgrades == 1
+
+
+def test_latency_between_headroom_and_budget_holds_the_level():
+    adaptive = controller()
+    feed(adaptive, 0.2, 3)
+    feed(adaptive, 0.08, 100)
+    assert adaptive.level == 1
+
+
+def test_should_infer_follows_infer_every():
+    adaptive = controller(levels=((0.5, 3, 0),))
+    decisions = [adaptive.should_infer() for _ in range(9)]
+    assert decisions == [False, False, True] * 3
+    assert (adaptive.inferred, adaptive.skipped) == (3, 6)
+
+
+def test_disabled_without_target_fps():
+    adaptive = AdaptiveController(target_fps=0)
+    feed(adaptive, 10.0, 100)
+    assert adaptive.level == 0
+    assert adaptive.snapshot()["avg_inference_ms"] == 0.0
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from broadcast import FrameHub
+
+
+def test_viewer_gets_the_newest_frame_only():
+    hub = FrameHub()
+    hub.publish(b"old")
+    hub.publish(b"new")
+    frames = hub.subscribe(timeout=0.01)
+    assert next(frames) == b"new"
+    frames.close()
+
+
+def test_slow_viewer_skips_to_the_newest_frame():
+    hub = FrameHub()
+    frames = hub.subscribe(timeout=0.01)
+    hub.publish(1)
+    assert next(frames) == 1
+    for frame in (2, 3, 4):
+        hub.publish(frame)
+    assert next(frames) == 4
+    frames.close()
+
+
+def test_viewers_share_one_producer():
+    hub = FrameHub()
+    hub.publish(b"frame")
+    first, second = hub.subscribe(timeout=0.01), hub.subscribe(timeout=0.01)
+    assert next(first) is next(second)
+    assert hub.subscribers == 2
+    first.close()
+    second.close()
+    assert hub.subscribers == 0
+
+
+def test_waiting_viewer_wakes_on_publish_and_ends_on_close():
+    hub = FrameHub()
+    received = []
+
+    def watch():
+        for frame in hub.subscribe(timeout=5):
+            received.append(frame)
+
+    viewer = threading.Thread(target=watch)
+    viewer.start()
+    while hub.subscribers == 0:
+        time.sleep(0.01)
+    hub.publish(b"frame")
+    while not received:
+        time.sleep(0.01)
+    hub.close()
+    viewer.join(1)
+    assert not viewer.is_alive()
+    assert received == [b"frame"]
+    assert hub.closed
+
@@ -0,0 +1,33 @@
+from emitter import TelemetryEmitter
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, payload, to=None):
+        self.sent.append((event, payload, to))
+
+
+def emitter():
+    socketio = FakeSocketIO()
+    return TelemetryEmitter(socketio), socketio.sent
+
+
+def test_counter_events_keep_only_the_latest_per_key():
+    telemetry, sent = emitter()
+    for count in (1, 2, 3):
+        telemetry.event("count_update", {"count": count}, room="r")
+    telemetry.event("count_update", {"count": 7}, room="r", key=2)
+    telemetry.flush()
+    assert sent == [("count_update", {"count": 3}, "r"), ("count_update", {"count": 7}, "r")]
+
+
+def test_queued_events_are_all_sent_in_order():
+    telemetry, sent = emitter()
+    telemetry.queue_event("rep", {"rep": 1}, room="r")
+    telemetry.queue_event("rep", {"rep": 2}, room="r")
+    telemetry.flush()
+    assert sent == [("rep", {"rep": 1}, "r"), ("rep", {"rep": 2}, "r")]
+    telemetry.flush()
+    assert len(sent) == 2
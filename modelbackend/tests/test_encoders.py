@@ -0,0 +1,42 @@
+from encoders import paced
+
+
+def timed(arrivals):
+    """Frames named by index that arrive at the given times, with a clock to match."""
+    now = [0.0]
+
+    def frames():
+        for i, arrival in enumerate(arrivals):
+            now[0] = arrival
+            yield i
+
+    return frames(), lambda: now[0]
+
+
+def test_steady_rate_passes_through():
+    frames, clock = timed([i / 10 for i in range(10)])
+    assert list(paced(frames, 10, clock=clock)) == list(range(10))
+
+
+def test_fast_input_is_thinned_to_fps():
+    frames, clock = timed([i / 30 for i in range(30)])
+    out = list(paced(frames, 10, clock=clock))
+    assert len(out) == 10
+    assert out == sorted(out)
+
+
+def test_slow_input_repeats_frames():
+    frames, clock = timed([0.0, 0.3, 0.6])
+    assert list(paced(frames, 10, clock=clock)) == [0, 0, 0, 1, 1, 1, 2]
+
+
+def test_long_stall_restarts_the_clock():
+    frames, clock = timed([0.0, 0.1, 10.0, 10.15])
+    assert list(paced(frames, 10, clock=clock, max_gap=2.0)) == [0, 1, 2, 3]
+
+
+def test_output_matches_elapsed_time():
+    arrivals = [0.0, 0.05, 0.3, 0.31, 0.32, 0.7, 0.75, 1.0]
+    frames, clock = timed(arrivals)
+    out = list(paced(frames, 20, clock=clock))
+    assert len(out) == int(1.0 * 20) + 1
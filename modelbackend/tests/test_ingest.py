@@ -0,0 +1,115 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import ingest
+from ingest import FrameTooLargeError, IngestError, IngestSource, parse_landmarks, parse_timestamp
+from sources import Landmarks
+
+
+def points(people=1):
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 1, (people, 33, 4)).astype("<f4")
+
+
+def test_parse_bytes_views_without_copying():
+    raw = points()[0]
+    data = bytearray(raw.tobytes())
+    parsed = parse_landmarks(data)
+    assert parsed.shape == (33, 4)
+    np.testing.assert_array_equal(parsed, raw)
+    assert np.shares_memory(parsed, np.frombuffer(data, dtype="<f4"))
+
+
+def test_parse_nested_lists():
+    raw = points()[0]
+    np.testing.assert_allclose(parse_landmarks(raw.tolist()), raw)
+
+
+@pytest.mark.parametrize("payload", [b"\0" * 16, [[0.0, 0.0, 0.0]] * 33, "landmarks", [[0.0] * 4] * 32])
+def test_parse_rejects_wrong_shapes(payload):
+    with pytest.raises(IngestError):
+        parse_landmarks(payload)
+
+
+def test_parse_rejects_non_finite_values():
+    raw = points()[0]
+    raw[5, 1] = np.nan
+    with pytest.raises(IngestError, match="NaN"):
+        parse_landmarks(raw.tobytes())
+
+
+def test_parse_several_people():
+    raw = points(3)
+    assert parse_landmarks(raw.tobytes(), max_people=4).shape == (3, 33, 4)
+    assert parse_landmarks(raw[0].tolist(), max_people=4).shape == (1, 33, 4)
+    with pytest.raises(IngestError):
+        parse_landmarks(raw.tobytes(), max_people=2)
+
+
+def test_read_returns_only_the_newest_upload():
+    source = IngestSource().open(threading.Event())
+    source.push_landmarks(points()[0].tobytes())
+    newest = points()[0] * 0.5
+    source.push_landmarks(newest.tobytes())
+    packet = source.read()
+    assert isinstance(packet.frame, Landmarks)
+    np.testing.assert_array_equal(packet.frame.points, newest)
+    assert source.stats()["received"] == 2
+    assert source.stats()["replaced"] == 1
+
+
+def test_read_wakes_on_upload_and_stops_with_the_run():
+    stop = threading.Event()
+    source = IngestSource(poll_interval=0.01).open(stop)
+    threading.Timer(0.05, source.push_landmarks, (points()[0].tobytes(),)).start()
+    assert isinstance(source.read().frame, Landmarks)
+    stop.set()
+    assert source.read() is None
+
+
+def test_push_jpeg_decodes_bgr():
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    image[..., 2] = 255
+    ok, jpeg = cv2.imencode(".jpg", image)
+    source = IngestSource().open(threading.Event())
+    source.push_jpeg(jpeg.tobytes())
+    frame = source.read().frame
+    assert frame.shape == (48, 64, 3)
+    assert frame[..., 2].mean() > 240 and frame[..., 0].mean() < 15
+
+
+def test_push_jpeg_rejects_garbage_and_oversized_frames(monkeypatch):
+    source = IngestSource().open(threading.Event())
+    with pytest.raises(IngestError):
+        source.push_jpeg(b"not a jpeg")
+    monkeypatch.setattr(ingest, "MAX_FRAME_BYTES", 10)
+    with pytest.raises(FrameTooLargeError) as error:
+        source.push_jpeg(b"\xff" * 11)
+    assert error.value.status == 413
+
+
+def test_uploads_carry_the_client_timestamp():
+    source = IngestSource().open(threading.Event())
+    source.push_landmarks(points()[0].tobytes(), timestamp=12.5)
+    assert source.read().timestamp == 12.5
+
+
+def test_uploads_without_a_timestamp_are_timed_by_arrival():
+    source = IngestSource().open(threading.Event())
+    source.push_landmarks(points()[0].tobytes())
+    packet = source.read()
+    assert packet.timestamp == packet.timings["capture"]
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), ("", None), ("1.25", 1.25), (3, 3.0)])
+def test_parse_timestamp(value, expected):
+    assert parse_timestamp(value) == expected
+
+
+@pytest.mark.parametrize("value", ["soon", "nan", "inf", [1]])
+def test_parse_timestamp_rejects_non_numbers(value):
+    with pytest.raises(IngestError):
+        parse_timestamp(value)
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from kinematics import (ANGLE_NAMES, JOINT_ANGLES, MAX_SIDE_DISAGREEMENT, NUM_LANDMARKS, angle_of, angle_sides,
+                        joint_angles)
+
+
+def calculate_angle(a, b, c):
+    # The per-exercise scripts' original angle at b, kept as the reference.
+    ba = np.array(a) - np.array(b)
+    bc = np.array(c) - np.array(b)
+    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
+    return np.degrees(np.arccos(cosine_angle))
+
+
+def random_pose(rng, visibility=0.9):
+    points = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    points[:, :3] = rng.uniform(0.0, 1.0, (NUM_LANDMARKS, 3))
+    points[:, 3] = visibility
+    return points
+
+
+def test_matches_reference_angle():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        points = random_pose(rng)
+        angles = joint_angles(points)
+        for name, (a, b, c) in JOINT_ANGLES.items():
+            expected = calculate_angle(points[a, :2], points[b, :2], points[c, :2])
+            # float32 arccos loses a few hundredths of a degree near 0 and 180.
+            assert angle_of(angles, name) == pytest.approx(expected, abs=0.05)
+
+
+def test_world_landmarks_use_three_dimensions():
+    rng = np.random.default_rng(1)
+    points = random_pose(rng)
+    angles = joint_angles(points, dims=3)
+    a, b, c = JOINT_ANGLES["left_knee"]
+    assert angle_of(angles, "left_knee") == pytest.approx(calculate_angle(points[a, :3], points[b, :3],
+                                                                          points[c, :3]), abs=1e-3)
+
+
+def test_batch_matches_single_frames():
+    rng = np.random.default_rng(2)
+    batch = np.stack([random_pose(rng) for _ in range(8)])
+    angles = joint_angles(batch)
+    assert angles.shape == (8, len(ANGLE_NAMES))
+    for frame, frame_angles in zip(batch, angles):
+        np.testing.assert_allclose(joint_angles(frame), frame_angles, rtol=1e-6, equal_nan=True)
+
+
+def test_degenerate_and_missing_joints_are_nan():
+    rng = np.random.default_rng(3)
+    points = random_pose(rng)
+    a, b, c = JOINT_ANGLES["left_elbow"]
+    points[a] = points[b]
+    a, b, c = JOINT_ANGLES["right_knee"]
+    points[c, :2] = np.nan
+    angles = joint_angles(points)
+    assert np.isnan(angle_of(angles, "left_elbow"))
+    assert np.isnan(angle_of(angles, "right_knee"))
+    assert not np.isnan(angle_of(angles, "left_knee"))
+
+
+def set_angle(points, name, degrees):
+    # Put the joint's outer points at `degrees` around its vertex.
+    a, b, c = JOINT_ANGLES[name]
+    theta = np.radians(degrees)
+    points[b, :2] = (0.5, 0.5)
+    points[c, :2] = (0.5, 0.3)
+    points[a, :2] = (0.5 + 0.2 * np.sin(theta), 0.5 - 0.2 * np.cos(theta))
+
+
+def bilateral(left_angle, right_angle, left_visibility=0.9, right_visibility=0.9):
+    points = random_pose(np.random.default_rng(4))
+    left, right = angle_sides("knee")
+    set_angle(points, left, left_angle)
+    set_angle(points, right, right_angle)
+    points[list(JOINT_ANGLES[left]), 3] = left_visibility
+    points[list(JOINT_ANGLES[right]), 3] = right_visibility
+    return joint_angles(points)
+
+
+def test_sides_that_agree_are_averaged_by_visibility():
+    assert angle_of(bilateral(100, 110), "knee") == pytest.approx(105, abs=1e-3)
+    assert angle_of(bilateral(100, 110, 0.9, 0.6), "knee") == pytest.approx(104, abs=1e-3)
+
+
+def test_poorly_seen_side_is_ignored():
+    assert angle_of(bilateral(100, 110, 0.9, 0.2), "knee") == pytest.approx(100, abs=1e-3)
+    assert angle_of(bilateral(100, 110, 0.3, 0.8), "knee") == pytest.approx(110, abs=1e-3)
+
+
+def test_disagreeing_sides_take_the_better_seen_one():
+    angles = bilateral(90, 90 + MAX_SIDE_DISAGREEMENT + 10, 0.7, 0.9)
+    assert angle_of(angles, "knee") == pytest.approx(90 + MAX_SIDE_DISAGREEMENT + 10, abs=1e-3)
+
+
+def test_missing_side_falls_back_to_the_other():
+    points = random_pose(np.random.default_rng(5))
+    left, right = angle_sides("elbow")
+    set_angle(points, left, 120)
+    points[JOINT_ANGLES[right][0], :2] = np.nan
+    assert angle_of(joint_angles(points), "elbow") == pytest.approx(120, abs=1e-3)
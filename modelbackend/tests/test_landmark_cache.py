@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+
+import landmark_cache
+from landmark_cache import LandmarkCache
+
+
+def landmarks(frames=10, value=0.5):
+    return np.full((frames, 33, 4), value, dtype=np.float32)
+
+
+def age(cache, key, mtime):
+    for path in cache._paths(key):
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"frames")
+    return path
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    cache.put("a", landmarks(), {"fps": 30.0})
+    points, meta = cache.get("a")
+    assert isinstance(points, np.memmap)
+    assert points.shape == (10, 33, 4)
+    assert meta == {"fps": 30.0}
+    assert cache.get("missing") is None
+
+
+def test_key_follows_contents_and_settings(tmp_path, video):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    key = cache.key(str(video), {"model_complexity": 1})
+    assert cache.key(str(video), {"model_complexity": 1}) == key
+    assert cache.key(str(video), {"model_complexity": 2}) != key
+    video.write_bytes(b"edited")
+    assert cache.key(str(video), {"model_complexity": 1}) != key
+
+
+def test_digest_is_reused_until_the_file_changes(tmp_path, video, monkeypatch):
+    hashed = []
+    digest = landmark_cache.file_digest
+    monkeypatch.setattr(landmark_cache, "file_digest", lambda path: hashed.append(path) or digest(path))
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    key = cache.key(str(video), {})
+    assert cache.key(str(video), {}) == key
+    # A later run reads the remembered digest from disk.
+    assert LandmarkCache(cache.directory).key(str(video), {}) == key
+    assert len(hashed) == 1
+    stat = os.stat(video)
+    os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.key(str(video), {}) == key
+    assert len(hashed) == 2
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+    for mtime, key in enumerate("abc"):
+        cache.put(key, landmarks(), {})
+        age(cache, key, 1000 + mtime)
+    entry = cache.size() // 3
+    # Reading "a" makes "b" the oldest.
+    cache.get("a")
+    cache.max_bytes = 2 * entry
+    cache.put("d", landmarks(), {})
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+    assert cache.size() <= cache.max_bytes
+
+
+def test_entries_without_a_sidecar_are_skipped(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    cache.put("a", landmarks(), {})
+    os.unlink(cache._paths("a")[1])
+    assert cache.entries() == []
+    assert cache.get("a") is None
+
+
+def test_clear_removes_everything(tmp_path, video):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    cache.key(str(video), {})
+    cache.put("a", landmarks(), {})
+    cache.put("b", landmarks(), {})
+    cache.clear()
+    assert cache.size() == 0
+    assert os.listdir(cache.directory) == ["digests"]
+    assert os.listdir(cache.digest_directory) == []
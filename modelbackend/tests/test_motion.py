@@ -0,0 +1,63 @@
+import numpy as np
+
+from motion import MotionGate
+
+
+def frame(value=100, size=(480, 640)):
+    return np.full(size + (3,), value, dtype=np.uint8)
+
+
+def idle_gate(**kwargs):
+    gate = MotionGate(idle_after=3, **kwargs)
+    for _ in range(2):
+        assert not gate.observe(False)
+    assert gate.observe(False)
+    assert gate.idle
+    return gate
+
+
+def test_goes_idle_after_consecutive_empty_frames():
+    gate = MotionGate(idle_after=3)
+    gate.observe(False)
+    gate.observe(False)
+    # Anybody found resets the run.
+    gate.observe(True)
+    assert not gate.observe(False)
+    assert not gate.observe(False)
+    assert gate.observe(False)
+    # Already idle: further empty frames don't report it again.
+    assert not gate.observe(False)
+    assert gate.stats()["idle_periods"] == 1
+
+
+def test_still_scene_stays_idle():
+    gate = idle_gate()
+    for _ in range(10):
+        assert not gate.moved(frame())
+    assert gate.idle
+
+
+def test_slow_lighting_change_is_not_motion():
+    gate = idle_gate()
+    for value in range(100, 130):
+        assert not gate.moved(frame(value))
+    assert gate.idle
+
+
+def test_motion_wakes_the_gate():
+    gate = idle_gate()
+    gate.moved(frame())
+    moving = frame()
+    moving[100:300, 200:400] = 250
+    assert gate.moved(moving)
+    assert not gate.idle
+    # Waking resets the empty-frame run.
+    assert not gate.observe(False)
+
+
+def test_due_publishes_at_idle_fps():
+    gate = idle_gate(idle_fps=2.0)
+    shown = [gate.due(i / 30) for i in range(60)]
+    assert sum(shown) == 4
+    assert shown[0] and shown[15]
+    assert gate.stats()["gated_frames"] == 56
@@ -0,0 +1,80 @@
+import numpy as np
+
+from people import PersonTracker
+
+
+def person(x, y=0.5):
+    points = np.zeros((33, 4), dtype=np.float32)
+    points[:, 0] = x
+    points[:, 1] = y
+    points[:, 3] = 0.9
+    return points
+
+
+def tracker(max_people=4, **kwargs):
+    return PersonTracker(object, max_people, **kwargs)
+
+
+def ids(people):
+    return sorted(p.id for p in people)
+
+
+def test_ids_follow_people_as_they_move():
+    people = tracker()
+    first = {p.id: p.centroid[0] for p in people.update([person(0.2), person(0.7)], 0.0)}
+    # Listed in the other order and moved a little: the IDs stay with each person.
+    second = {p.id: p.centroid[0] for p in people.update([person(0.75), person(0.25)], 0.1)}
+    assert first.keys() == second.keys() == {1, 2}
+    for person_id in first:
+        assert abs(second[person_id] - first[person_id]) < 0.1
+
+
+def test_each_person_keeps_their_own_tracker():
+    people = tracker()
+    people.update([person(0.2), person(0.7)], 0.0)
+    trackers = {p.id: p.tracker for p in people.people}
+    people.update([person(0.7), person(0.2)], 0.1)
+    assert {p.id: p.tracker for p in people.people} == trackers
+    assert trackers[1] is not trackers[2]
+
+
+def test_far_jump_starts_a_new_track():
+    people = tracker(max_distance=0.2)
+    people.update([person(0.1)], 0.0)
+    people.update([person(0.9)], 0.1)
+    assert ids(people.people) == [1, 2]
+
+
+def test_max_people_caps_new_tracks():
+    people = tracker(max_people=2)
+    seen = people.update([person(0.1), person(0.5), person(0.9)], 0.0)
+    assert len(seen) == 2
+    assert len(people.people) == 2
+
+
+def test_short_gap_keeps_the_id_and_long_gap_drops_it():
+    people = tracker(max_missed=3)
+    people.update([person(0.3)], 0.0)
+    for i in range(3):
+        people.update([], 0.1 * (i + 1))
+    assert ids(people.people) == [1]
+    assert ids(people.update([person(0.31)], 0.4)) == [1]
+    for i in range(4):
+        people.update([], 0.5 + 0.1 * i)
+    assert people.people == []
+    assert ids(people.update([person(0.3)], 1.0)) == [2]
+
+
+def test_nan_detections_are_ignored():
+    missing = np.full((33, 4), np.nan, dtype=np.float32)
+    assert tracker().update([missing], 0.0) == []
+
+
+def test_reset_replaces_trackers_and_keeps_ids():
+    people = tracker()
+    people.update([person(0.2), person(0.7)], 0.0)
+    before = [p.tracker for p in people.people]
+    people.reset(make_tracker=dict)
+    assert ids(people.people) == [1, 2]
+    assert all(isinstance(p.tracker, dict) for p in people.people)
+    assert all(p.tracker is not old for p, old in zip(people.people, before))
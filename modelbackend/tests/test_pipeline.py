@@ -0,0 +1,48 @@
+import queue
+import threading
+
+import pytest
+
+from pipeline import DropQueue
+
+
+def test_full_queue_drops_the_oldest_item():
+    drops = []
+    stage = DropQueue(maxsize=2, on_drop=lambda: drops.append(1))
+    for item in range(5):
+        stage.put(item)
+    assert [stage.get(timeout=0), stage.get(timeout=0)] == [3, 4]
+    assert stage.dropped == 3
+    assert len(drops) == 3
+
+
+def test_get_times_out_when_empty():
+    with pytest.raises(queue.Empty):
+        DropQueue().get(timeout=0.01)
+
+
+def test_backpressure_waits_for_room():
+    stop = threading.Event()
+    stage = DropQueue(maxsize=1, block_until=stop)
+    stage.put(1)
+    writer = threading.Thread(target=stage.put, args=(2,))
+    writer.start()
+    writer.join(0.2)
+    assert writer.is_alive()
+    assert stage.get(timeout=1) == 1
+    writer.join(1)
+    assert stage.get(timeout=1) == 2
+    assert stage.dropped == 0
+
+
+def test_backpressure_gives_up_once_stopped():
+    stop = threading.Event()
+    stage = DropQueue(maxsize=1, block_until=stop)
+    stage.put(1)
+    writer = threading.Thread(target=stage.put, args=(2,))
+    writer.start()
+    stop.set()
+    writer.join(1)
+    assert not writer.is_alive()
+    assert stage.get(timeout=0) == 1
+
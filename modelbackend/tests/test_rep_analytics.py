@@ -0,0 +1,86 @@
+import math
+
+from exercises import EXERCISES
+from rep_analytics import RepAnalyzer
+from rep_counter import RepCounter
+
+
+def run(exercise, angles, fps=10.0, history=50):
+    spec = EXERCISES[exercise]
+    counter, analyzer = RepCounter(spec), RepAnalyzer(spec, history=history)
+    records = []
+    for i, angle in enumerate(angles):
+        was_flexed = counter.flexed
+        counter.update(angle)
+        record = analyzer.update(i / fps, angle, counter.flexed, was_flexed, counter.count)
+        if record is not None:
+            records.append(record)
+    return analyzer, records
+
+
+def test_squat_record_closes_on_count():
+    # Top at 0.0 s, bottom at 0.3 s, back up at 0.5 s.
+    _, records = run("squat", [170, 140, 110, 80, 120, 170])
+    assert len(records) == 1
+    record = records[0]
+    assert record["rep"] == 1
+    assert not record["partial"]
+    assert record["start_s"] == 0.0
+    assert record["bottom_s"] == 0.3
+    assert record["end_s"] == 0.5
+    assert record["duration_s"] == 0.5
+    # Counted on extension: the way up is the concentric phase.
+    assert record["eccentric_s"] == 0.3
+    assert record["concentric_s"] == 0.2
+    assert record["min_angle"] == 80
+    assert record["max_angle"] == 170
+    assert record["range_of_motion"] == 90
+
+
+def test_flex_counted_record_closes_after_the_eccentric_phase():
+    # Pull-up: counted on reaching the top (flexed), recorded once back down.
+    _, records = run("pullup", [170, 100, 30, 100, 170])
+    assert len(records) == 1
+    record = records[0]
+    assert record["rep"] == 1
+    assert record["concentric_s"] == 0.2
+    assert record["eccentric_s"] == 0.2
+
+
+def test_shallow_excursion_is_a_partial_rep():
+    _, records = run("squat", [170, 120, 170])
+    assert len(records) == 1
+    assert records[0]["partial"]
+    assert records[0]["rep"] is None
+
+
+def test_small_wobble_at_the_top_records_nothing():
+    _, records = run("squat", [170, 150, 170, 165])
+    assert records == []
+
+
+def test_nan_frames_are_ignored():
+    _, records = run("squat", [170, math.nan, 80, math.nan, 170])
+    assert [record["rep"] for record in records] == [1]
+
+
+def test_summary_averages_counted_reps_only():
+    analyzer, records = run("squat", [170, 80, 170, 120, 170, 70, 70, 170])
+    assert [record["partial"] for record in records] == [False, True, False]
+    summary = analyzer.summary()
+    assert summary["reps"] == 2
+    assert summary["partial_reps"] == 1
+    assert summary["min_angle"] == 70
+    assert summary["avg_duration_s"] == 0.25
+    assert summary["avg_range_of_motion"] == 95
+
+
+def test_summary_without_reps():
+    analyzer = RepAnalyzer(EXERCISES["squat"])
+    assert analyzer.summary() == {"reps": 0, "partial_reps": 0}
+
+
+def test_history_is_bounded():
+    analyzer, records = run("squat", [170, 80] * 10 + [170], history=3)
+    assert len(records) == 10
+    assert [record["rep"] for record in analyzer.records] == [8, 9, 10]
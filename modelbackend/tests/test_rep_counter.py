@@ -0,0 +1,127 @@
+import math
+
+import pytest
+
+from exercises import EXERCISES
+from rep_counter import RepCounter
+
+SQUAT = EXERCISES["squat"]
+
+
+def spec(**overrides):
+    return dict(SQUAT, **overrides)
+
+
+def feed(counter, angles):
+    return [counter.update(angle) for angle in angles]
+
+
+def test_starts_in_start_stage():
+    counter = RepCounter(SQUAT)
+    assert counter.stage == SQUAT["start_stage"]
+    assert counter.count == 0
+
+
+def test_counts_one_rep_on_extension():
+    counter = RepCounter(SQUAT)
+    assert feed(counter, [170, 90]) == [False, False]
+    assert counter.stage == SQUAT["flexed_stage"]
+    assert feed(counter, [170]) == [True]
+    assert counter.count == 1
+    assert counter.stage == SQUAT["extended_stage"]
+
+
+def test_count_on_flex():
+    counter = RepCounter(spec(count_on="flex"))
+    assert feed(counter, [170, 90]) == [False, True]
+    assert feed(counter, [170]) == [False]
+    assert counter.count == 1
+
+
+def test_start_flexed():
+    counter = RepCounter(spec(start_stage=SQUAT["flexed_stage"]))
+    assert counter.flexed
+    assert feed(counter, [170]) == [True]
+
+
+def test_thresholds_are_strict():
+    counter = RepCounter(SQUAT)
+    feed(counter, [SQUAT["flex_below"]])
+    assert not counter.flexed
+    feed(counter, [SQUAT["flex_below"] - 0.1, SQUAT["extend_above"]])
+    assert counter.flexed
+    assert counter.count == 0
+
+
+def test_angles_between_thresholds_change_nothing():
+    counter = RepCounter(SQUAT)
+    feed(counter, [90] + [130] * 20)
+    assert counter.flexed
+    assert counter.count == 0
+
+
+def test_nan_leaves_state_alone():
+    counter = RepCounter(spec(min_dwell=3))
+    feed(counter, [90, 90])
+    assert feed(counter, [math.nan] * 5) == [False] * 5
+    assert counter.pending == 2
+    feed(counter, [90])
+    assert counter.flexed
+
+
+def test_min_dwell_ignores_short_spikes():
+    counter = RepCounter(spec(min_dwell=3))
+    feed(counter, [90, 90, 170, 90])
+    assert not counter.flexed
+    feed(counter, [90, 90])
+    assert counter.flexed
+    assert feed(counter, [170, 170, 170]) == [False, False, True]
+
+
+def test_dwell_resets_when_angle_falls_back_without_hysteresis():
+    counter = RepCounter(spec(min_dwell=3))
+    feed(counter, [90, 90, 105, 90, 90])
+    assert not counter.flexed
+    assert counter.pending == 2
+
+
+@pytest.mark.parametrize("wobble, flexed", [(108, True), (115, False)])
+def test_hysteresis_band_keeps_pending_dwell(wobble, flexed):
+    # flex_below is 100: a wobble back within the 10 degree band keeps the
+    # dwell count, one past it starts over.
+    counter = RepCounter(spec(min_dwell=3, hysteresis=10))
+    feed(counter, [90, 90, wobble, 90])
+    assert counter.flexed is flexed
+
+
+def test_hysteresis_frames_do_not_count_towards_dwell():
+    counter = RepCounter(spec(min_dwell=3, hysteresis=10))
+    feed(counter, [90, 105, 105, 105])
+    assert not counter.flexed
+    assert counter.pending == 1
+
+
+def test_jitter_around_threshold_counts_once():
+    counter = RepCounter(spec(min_dwell=2, hysteresis=5))
+    feed(counter, [170, 90, 90, 101, 99, 101, 99, 90, 158, 162, 158, 162, 170, 90, 99, 101, 99, 90, 170, 170])
+    assert counter.count == 2
+
+
+def test_reset():
+    counter = RepCounter(SQUAT)
+    feed(counter, [90, 170, 90])
+    counter.reset()
+    assert counter.count == 0
+    assert not counter.flexed
+    assert counter.pending == 0
+
+
+@pytest.mark.parametrize("exercise", sorted(EXERCISES))
+def test_every_exercise_counts_full_sweeps(exercise):
+    exercise_spec = EXERCISES[exercise]
+    counter = RepCounter(exercise_spec)
+    low, high = exercise_spec["flex_below"] - 10, exercise_spec["extend_above"] + 10
+    start_flexed = exercise_spec["start_stage"] == exercise_spec["flexed_stage"]
+    rep = [low, high] if not start_flexed else [high, low]
+    feed(counter, rep * 5)
+    assert counter.count == 5
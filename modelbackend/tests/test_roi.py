@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from roi import RegionOfInterest
+
+FRAME = (720, 1280, 3)
+
+
+def person(x0=0.4, y0=0.3, width=0.1, height=0.3, visibility=0.9, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.empty((33, 4), dtype=np.float32)
+    points[:, 0] = rng.uniform(x0, x0 + width, 33)
+    points[:, 1] = rng.uniform(y0, y0 + height, 33)
+    points[:, 2] = rng.uniform(-0.2, 0.2, 33)
+    points[:, 3] = visibility
+    return points
+
+
+def to_crop(roi, points):
+    # The inverse of to_frame(): where the crop model would have reported these landmarks.
+    x, y, side = roi.box
+    width, height = roi.frame_size
+    crop = points.copy()
+    crop[:, 0] = (points[:, 0] * width - x) / side
+    crop[:, 1] = (points[:, 1] * height - y) / side
+    crop[:, 2] = points[:, 2] * width / side
+    return crop
+
+
+def test_to_frame_round_trips():
+    roi = RegionOfInterest()
+    points = person()
+    roi.update(points, FRAME)
+    assert roi.box is not None
+    np.testing.assert_allclose(roi.to_frame(to_crop(roi, points)), points, atol=1e-5)
+
+
+def test_to_frame_maps_crop_corners_to_box_corners():
+    roi = RegionOfInterest()
+    roi.update(person(), FRAME)
+    x, y, side = roi.box
+    corners = np.zeros((33, 4), dtype=np.float32)
+    corners[1, :2] = 1.0
+    mapped = roi.to_frame(corners)
+    assert mapped[0, :2] == pytest.approx((x / 1280, y / 720))
+    assert mapped[1, :2] == pytest.approx(((x + side) / 1280, (y + side) / 720))
+
+
+def test_box_is_square_covers_the_person_and_stays_in_frame():
+    roi = RegionOfInterest()
+    points = person(x0=0.9, width=0.08)
+    roi.update(points, FRAME)
+    x, y, side = roi.box
+    assert 0 <= x and x + side <= 1280 and 0 <= y and y + side <= 720
+    assert x <= points[:, 0].min() * 1280 and points[:, 0].max() * 1280 <= x + side
+    assert y <= points[:, 1].min() * 720 and points[:, 1].max() * 720 <= y + side
+
+
+def test_crop_has_the_input_size():
+    roi = RegionOfInterest()
+    frame = np.zeros(FRAME, dtype=np.uint8)
+    assert roi.crop(frame, None) is None
+    roi.update(person(), FRAME)
+    crop = roi.crop(frame, np.empty((roi.input_size, roi.input_size, 3), dtype=np.uint8))
+    assert crop.shape == (roi.input_size, roi.input_size, 3)
+    assert roi.stats()["cropped_frames"] == 1 and roi.stats()["full_frames"] == 1
+
+
+def test_box_is_kept_while_the_person_stays_inside():
+    roi = RegionOfInterest()
+    roi.update(person(), FRAME)
+    box = roi.box
+    roi.update(person(x0=0.401, seed=1), FRAME)
+    assert roi.box == box
+
+
+@pytest.mark.parametrize("points", [None, person(visibility=0.1), person(x0=0.05, y0=0.05, width=0.9, height=0.9)])
+def test_falls_back_to_the_full_frame(points):
+    roi = RegionOfInterest()
+    roi.update(person(), FRAME)
+    roi.update(points, FRAME)
+    assert roi.box is None
+
+
+def test_new_frame_size_drops_the_box():
+    roi = RegionOfInterest()
+    roi.update(person(), FRAME)
+    assert roi.crop(np.zeros((480, 640, 3), dtype=np.uint8), None) is None
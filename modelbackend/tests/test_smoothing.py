@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from smoothing import LandmarkSmoother, OneEuroFilter
+
+
+def test_first_sample_passes_through():
+    smoother = OneEuroFilter((3,), min_cutoff=1.0)
+    np.testing.assert_array_equal(smoother(np.array([1.0, 2.0, 3.0]), 0.0), [1.0, 2.0, 3.0])
+
+
+def test_jitter_is_reduced():
+    rng = np.random.default_rng(0)
+    smoother = OneEuroFilter((1,), min_cutoff=1.0, beta=0.0)
+    noisy = 0.5 + rng.normal(0.0, 0.01, 300)
+    out = np.array([smoother(np.array([value]), i / 30)[0] for i, value in enumerate(noisy)])
+    assert out[30:].std() < noisy[30:].std() / 2
+
+
+def test_beta_reduces_lag_on_fast_motion():
+    def lag(beta):
+        smoother = OneEuroFilter((1,), min_cutoff=1.0, beta=beta)
+        for i in range(30):
+            out = smoother(np.array([i * 0.05]), i / 30)[0]
+        return 29 * 0.05 - out
+
+    assert lag(10.0) < lag(0.0)
+
+
+def test_non_increasing_timestamps_are_ignored():
+    smoother = OneEuroFilter((1,))
+    smoother(np.array([0.0]), 1.0)
+    assert smoother(np.array([5.0]), 1.0)[0] == 0.0
+
+
+def test_short_dropouts_are_bridged_then_reset():
+    smoother = LandmarkSmoother(max_gap=2)
+    points = np.full((33, 4), 0.5, dtype=np.float32)
+    smoother.update(points, 0.0)
+    bridged = smoother.update(None, 1 / 30)
+    assert bridged is not None
+    assert bridged[0, 3] == pytest.approx(0.5 * smoother.gap_visibility_decay)
+    assert smoother.update(None, 2 / 30) is not None
+    assert smoother.update(None, 3 / 30) is None
+    assert not smoother.active
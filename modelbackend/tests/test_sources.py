@@ -0,0 +1,130 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import sources
+from sources import CameraStream
+
+
+class FakeCapture:
+    """A VideoCapture stand-in that records any overlap between grab() and retrieve()."""
+
+    def __init__(self, fail_after=None, grab_seconds=0.005):
+        self.fail_after = fail_after
+        self.grab_seconds = grab_seconds
+        self.grabs = 0
+        self.busy = 0
+        self.overlaps = 0
+        self.released = False
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.busy += 1
+            if self.busy > 1:
+                self.overlaps += 1
+
+    def _exit(self):
+        with self._lock:
+            self.busy -= 1
+
+    def grab(self):
+        self._enter()
+        try:
+            time.sleep(self.grab_seconds)
+            self.grabs += 1
+            return self.fail_after is None or self.grabs <= self.fail_after
+        finally:
+            self._exit()
+
+    def retrieve(self, out=None):
+        self._enter()
+        try:
+            time.sleep(0.002)
+            frame = out if out is not None and out.shape == (4, 4, 3) else np.empty((4, 4, 3), dtype=np.uint8)
+            frame.fill(self.grabs % 256)
+            return True, frame
+        finally:
+            self._exit()
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(sources, "RECONNECT_DELAY", 0.01)
+
+
+def read_for(stream, seconds, pause):
+    packets = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        packets.append(stream.read())
+        time.sleep(pause)
+    return packets
+
+
+@pytest.mark.parametrize("pause", [0.0, 0.02])
+def test_grab_and_retrieve_never_overlap(pause):
+    cap = FakeCapture()
+    stream = CameraStream(cap, lambda: FakeCapture(), "camera 0", threading.Event())
+    try:
+        packets = read_for(stream, 0.4, pause)
+    finally:
+        stream.close()
+    assert cap.overlaps == 0
+    assert all(packet is not None for packet in packets)
+    timestamps = [packet.timestamp for packet in packets]
+    assert timestamps == sorted(set(timestamps))
+    assert cap.released
+
+
+def test_slow_reader_skips_frames_without_decoding_them():
+    stream = CameraStream(FakeCapture(), lambda: FakeCapture(), "camera 0", threading.Event())
+    try:
+        read_for(stream, 0.3, 0.03)
+        stats = stream.stats()
+    finally:
+        stream.close()
+    assert stats["skipped"] > 0
+    assert stats["decoded"] + stats["skipped"] == stats["grabbed"]
+
+
+def test_reconnects_after_read_failure():
+    first = FakeCapture(fail_after=5)
+    opened = []
+    attempts = []
+
+    def reopen():
+        attempts.append(time.perf_counter())
+        if len(attempts) == 1:
+            raise OSError("Failed to open camera 0")
+        opened.append(FakeCapture())
+        return opened[-1]
+
+    stream = CameraStream(first, reopen, "camera 0", threading.Event())
+    try:
+        packets = read_for(stream, 0.5, 0.0)
+        stats = stream.stats()
+    finally:
+        stream.close()
+    assert first.released
+    assert len(attempts) >= 2
+    assert stats["reconnects"] == 1 and stats["connected"]
+    assert opened[0].grabs > 0 and opened[0].overlaps == 0
+    assert all(packet is not None for packet in packets)
+    assert opened[0].released
+
+
+def test_read_returns_none_once_stopped():
+    stop = threading.Event()
+    stream = CameraStream(FakeCapture(fail_after=0), lambda: FakeCapture(fail_after=0), "camera 0", stop)
+    stopper = threading.Timer(0.05, stop.set)
+    stopper.start()
+    try:
+        assert stream.read() is None
+    finally:
+        stream.close()